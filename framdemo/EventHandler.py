@@ -1,16 +1,68 @@
-"""Custom event handler to control display of demo output."""
+"""
+Custom event handler to control display of demo output.
+
+Events are sent from hot loops in framcore (e.g. debug events while populating or aggregating a model), so the handler
+keeps the cost of each event low:
+
+- Events below the configured level (EVENT_LEVEL in demo_utils) are dropped first, before the sender name is found
+  or the message is formatted.
+- Sender names are cached per sender type (or per code object for functions) and per calling method, so inspect is
+  only used the first time a sender is seen.
+- The calling method of an object sender is found by walking frames with sys._getframe, skipping the event dispatch
+  functions in framcore, instead of building the whole call stack with inspect.stack. It can be turned off
+  (EVENT_CALLER_NAMES in demo_utils).
+"""
 
 import inspect
+import sys
 from copy import deepcopy
 from pathlib import Path
+from types import CodeType, FrameType
+
+from framcore import Base, events
+
+# severity of event types that can be filtered by level. Other event types (e.g. display) are always handled.
+# Start and stop of timed spans (framdemo.tracing) are shown as debug and info events
+EVENT_LEVELS = {"debug": 10, "span_start": 10, "info": 20, "span_stop": 20, "warning": 30, "error": 40}
+
+_PACKAGES = ["framcore", "framdemo", "framdata", "framjules"]
+
+# functions between the method that sent an event and handle_event, skipped when finding the calling method
+_DISPATCH_CODES = frozenset(
+    func.__code__
+    for func in [
+        events.send_event,
+        events.send_warning_event,
+        events.send_error_event,
+        events.send_info_event,
+        events.send_debug_event,
+        Base.send_event,
+        Base.send_warning_event,
+        Base.send_error_event,
+        Base.send_info_event,
+        Base.send_debug_event,
+    ]
+)
 
 
 class EventHandler:
     """Handle events from framcore.events.send_event."""
 
+    def __init__(self, level: str = "debug", caller_names: bool = True) -> None:
+        """Handle events of level (see EVENT_LEVELS) and above. Add calling method to the name of object senders if caller_names."""
+        if level not in EVENT_LEVELS:
+            message = f"Unknown event level {level}. Must be one of {list(EVENT_LEVELS)}."
+            raise ValueError(message)
+        self._min_level = EVENT_LEVELS[level]
+        self._caller_names = caller_names
+        self._sender_names: dict[object, tuple[str, bool]] = dict()
+        self._method_names: dict[tuple[object, CodeType], str] = dict()
+
     def handle_event(self, sender: object, event_type: str, **kwargs: dict[str, object]) -> None:
         """Try to handle event using rich.print. Use Python.print otherwise."""
-        name = self._get_sender_name(sender)
+        if EVENT_LEVELS.get(event_type, self._min_level) < self._min_level:
+            return
+        name = self._get_sender_name(sender, sys._getframe(1))
         try:
             self._handle_event_using_rich(name, event_type, **kwargs)
         except Exception:
@@ -19,30 +71,25 @@ class EventHandler:
             else:
                 print(event_type, kwargs)
 
-    def _get_sender_name(self, sender: object) -> str:
-        if inspect.isbuiltin(sender) or sender is None:
+    def _get_sender_name(self, sender: object, frame: FrameType | None) -> str:
+        """Return cached name of sender, with the method that sent the event (found from frame) if sender is an object."""
+        if sender is None:
             return ""
-        is_func = False
-        try:
-            path = Path(inspect.getfile(type(sender)))
-        except Exception:
-            path = Path(inspect.getfile(sender))
-            is_func = True
-        package = None
-        for parent in path.parents:
-            if parent.name in ["framcore", "framdemo", "framdata", "framjules"]:
-                package = parent.name
-                break
-        name = sender.__name__ if is_func else type(sender).__name__
-
-        try:
-            if not is_func:
-                caller_method_name = inspect.stack()[5].function
-                name = f"{name}.{caller_method_name}"
-        except Exception:
-            pass
-
-        return f"{name}" if package is None else f"{package}.{name}"
+        key = _get_sender_key(sender)
+        if key not in self._sender_names:
+            self._sender_names[key] = _find_sender_name(sender)
+        name, is_func = self._sender_names[key]
+        if is_func or not name or not self._caller_names:
+            return name
+
+        while frame is not None and frame.f_code in _DISPATCH_CODES:
+            frame = frame.f_back
+        if frame is None:
+            return name
+        method_key = (key, frame.f_code)
+        if method_key not in self._method_names:
+            self._method_names[method_key] = f"{name}.{frame.f_code.co_name}"
+        return self._method_names[method_key]
 
     def _handle_event_using_rich(
         self,
@@ -50,7 +97,7 @@ class EventHandler:
         event_type: str,
         **kwargs: dict[str, object],
     ) -> None:
-        import rich  # noqa: PLC0415
+        import rich
 
         sender_color = "#5DE2E7"
         sender_string = f"[{sender_color}]{sender_name}: [/{sender_color}]" if sender_name else ""
@@ -67,6 +114,17 @@ class EventHandler:
             rich.print(f"[bold {color}]{event_type}: [/bold {color}]{sender_string}{message}")
             return
 
+        if event_type in ["span_start", "span_stop"]:
+            color = "blue"
+            indent = "  " * kwargs.get("depth", 0)
+            message = f"{indent}{kwargs['name']}"
+            if event_type == "span_stop":
+                message += f" {kwargs['wall_seconds']:.3f} s (cpu {kwargs['cpu_seconds']:.3f} s"
+                message += ")" if kwargs["rss_delta_mb"] is None else f", rss {kwargs['rss_delta_mb']:+.1f} MB)"
+                message += " failed" if kwargs["failed"] else ""
+            rich.print(f"[bold {color}]{event_type}: [/bold {color}]{sender_string}{message}")
+            return
+
         if event_type == "display":
             color = "cyan"
             message = kwargs["message"]
@@ -111,3 +169,33 @@ class EventHandler:
                     self._convert_len_1_to_float(value, digits_round)
                 else:
                     obj[key] = round(float(value[0]), digits_round)
+
+
+def _get_sender_key(sender: object) -> object:
+    """Return key of sender in the name cache: the class for class senders and objects, or the code object for functions."""
+    if isinstance(sender, type):
+        return sender
+    code = getattr(sender, "__code__", None)
+    return type(sender) if code is None else code
+
+
+def _find_sender_name(sender: object) -> tuple[str, bool]:
+    """Return name of sender, prefixed by its package if it is one of _PACKAGES, and True if sender is a function or class."""
+    if inspect.isbuiltin(sender):
+        return "", True
+    is_func = False
+    try:
+        path = Path(inspect.getfile(type(sender)))
+    except Exception:
+        try:
+            path = Path(inspect.getfile(sender))
+        except Exception:
+            return "", True
+        is_func = True
+    package = None
+    for parent in path.parents:
+        if parent.name in _PACKAGES:
+            package = parent.name
+            break
+    name = sender.__name__ if is_func else type(sender).__name__
+    return (name if package is None else f"{package}.{name}"), is_func
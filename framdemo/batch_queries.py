@@ -0,0 +1,149 @@
+"""
+Batched queries of many attributes (e.g. the prices of all power nodes) for the same scenario horizon, level period and unit.
+
+get_scenario_matrix returns the same values as calling get_scenario_vector on each attribute, but:
+- each distinct level and profile expression is evaluated only once, also when shared by many attributes,
+- profiles stored as time vectors with the same time index are resampled together as one 2-D array,
+- level * profile is done as one matrix operation for all attributes.
+
+Profiles that need more than a change of resolution (e.g. other period, 52-week years or reference period),
+and attributes with an intercept, are evaluated with fram-core one by one.
+"""
+
+import numpy as np
+from framcore.attributes import LevelProfile
+from framcore.expressions import Expr, get_level_value, get_profile_vector
+from framcore.querydbs import QueryDB
+from framcore.timeindexes import FixedFrequencyTimeIndex, SinglePeriodTimeIndex
+from framcore.timevectors import TimeVector
+from numpy.typing import NDArray
+
+
+def get_scenario_matrix(
+    db: QueryDB,
+    attributes: list[LevelProfile],
+    scenario_horizon: FixedFrequencyTimeIndex,
+    level_period: SinglePeriodTimeIndex,
+    unit: str | None,
+    is_float32: bool = True,
+) -> NDArray:
+    """Return 2-D array where row i is attributes[i].get_scenario_vector(db, scenario_horizon, level_period, unit, is_float32)."""
+    levels: dict[tuple[Expr, bool], float] = dict()
+    profile_rows: dict[tuple[Expr | None, bool], int] = dict()
+    rows: list[tuple[int, tuple[Expr, bool], int]] = []
+    other_rows: dict[int, NDArray] = dict()
+
+    for i, attribute in enumerate(attributes):
+        if attribute.get_intercept() is not None:
+            other_rows[i] = attribute.get_scenario_vector(db, scenario_horizon, level_period, unit, is_float32)
+            continue
+
+        level_expr = attribute.get_level()
+        if not isinstance(level_expr, Expr):
+            message = "Attribute level Expr is None. Have you called Solver.solve yet?"
+            raise ValueError(message)
+        is_max = attribute._IS_MAX_AND_ZERO_ONE
+
+        level_key = (level_expr, is_max)
+        if level_key not in levels:
+            levels[level_key] = get_level_value(expr=level_expr, db=db, scen_dim=scenario_horizon, data_dim=level_period, unit=unit, is_max=is_max)
+
+        profile_key = (attribute.get_profile(), is_max)
+        if profile_key not in profile_rows:
+            profile_rows[profile_key] = len(profile_rows)
+
+        rows.append((i, level_key, profile_rows[profile_key]))
+
+    profiles = _get_profile_matrix(db, list(profile_rows), scenario_horizon, level_period, is_float32)
+
+    # same dtype as level_value * profile_vector in get_scenario_vector
+    dtype = np.result_type(profiles.dtype, *levels.values(), *other_rows.values())
+    out = np.empty((len(attributes), scenario_horizon.get_num_periods()), dtype=dtype)
+    if rows:
+        index = np.array([i for i, __, __ in rows])
+        level_values = np.array([levels[level_key] for __, level_key, __ in rows]).astype(np.result_type(profiles.dtype, *levels.values()))
+        profile_index = np.array([profile_row for __, __, profile_row in rows])
+        out[index] = level_values[:, None] * profiles[profile_index]
+    for i, vector in other_rows.items():
+        out[i] = vector
+    return out
+
+
+def _get_profile_matrix(
+    db: QueryDB,
+    profiles: list[tuple[Expr | None, bool]],
+    scenario_horizon: FixedFrequencyTimeIndex,
+    level_period: SinglePeriodTimeIndex,
+    is_float32: bool,
+) -> NDArray:
+    """Return 2-D array with row i as profile vector of profiles[i] = (profile expr, is_zero_one)."""
+    dtype = np.float32 if is_float32 else np.float64
+    out = np.empty((len(profiles), scenario_horizon.get_num_periods()), dtype=dtype)
+
+    # time vectors that only need a change of resolution, grouped by time index and profile type
+    groups: dict[tuple[FixedFrequencyTimeIndex, bool, bool], list[tuple[int, TimeVector]]] = dict()
+
+    for i, (expr, is_zero_one) in enumerate(profiles):
+        if expr is None:
+            out[i] = 1.0
+            continue
+        timevector = _get_resampleable_timevector(db, expr, scenario_horizon, is_zero_one)
+        if timevector is None:
+            out[i] = get_profile_vector(expr=expr, db=db, data_dim=level_period, scen_dim=scenario_horizon, is_zero_one=is_zero_one, is_float32=is_float32)
+            continue
+        key = (timevector.get_timeindex(), timevector.is_zero_one_profile(), is_zero_one)
+        groups.setdefault(key, []).append((i, timevector))
+
+    for (timeindex, tv_is_zero_one, is_zero_one), members in groups.items():
+        index = np.array([i for i, __ in members])
+        values = np.stack([timevector.get_vector(is_float32) for __, timevector in members])
+        out[index] = _resample(values, timeindex, scenario_horizon)
+        if is_zero_one != tv_is_zero_one:
+            _convert_profile_type(out, index, is_zero_one)
+
+    return out
+
+
+def _get_resampleable_timevector(db: QueryDB, expr: Expr, scenario_horizon: FixedFrequencyTimeIndex, is_zero_one: bool) -> TimeVector | None:
+    """Return time vector behind profile expr if it can be resampled to scenario_horizon by _resample, else None."""
+    if not expr.is_leaf():
+        return None
+    src = expr.get_src()
+    timevector = db.get(src) if isinstance(src, str) else src
+    if not isinstance(timevector, TimeVector) or timevector.get_unit() is not None or not isinstance(timevector.is_zero_one_profile(), bool):
+        return None
+
+    timeindex = timevector.get_timeindex()
+    if not isinstance(timeindex, FixedFrequencyTimeIndex) or timeindex.is_constant():
+        return None
+    is_resampleable = (
+        scenario_horizon._is_compatible_resolution(timeindex)
+        and scenario_horizon.is_52_week_years() == timeindex.is_52_week_years()
+        and timeindex._is_same_period(scenario_horizon)
+    )
+    if not is_resampleable:
+        return None
+
+    # mean one profiles with different reference period are scaled with the mean over the target reference period
+    if not is_zero_one and not timevector.is_zero_one_profile() and scenario_horizon.get_reference_period() != timevector.get_reference_period():
+        return None
+    return timevector
+
+
+def _resample(values: NDArray, timeindex: FixedFrequencyTimeIndex, scenario_horizon: FixedFrequencyTimeIndex) -> NDArray:
+    """Resample rows of values from timeindex to scenario_horizon, which has the same period and the same or a multiple of the resolution."""
+    if timeindex.is_same_resolution(scenario_horizon):
+        return values
+    num_periods = scenario_horizon.get_num_periods()
+    return values.reshape((values.shape[0], num_periods, values.shape[1] // num_periods)).mean(axis=2)
+
+
+def _convert_profile_type(out: NDArray, index: NDArray, is_zero_one: bool) -> None:
+    """Convert rows index of out from mean one to zero one profiles, or the other way."""
+    rows = out[index]
+    if is_zero_one:
+        np.multiply(rows, (1 / rows.max(axis=1))[:, None], out=rows)
+    else:
+        is_nonzero = np.any(rows != 0, axis=1)
+        rows[is_nonzero] *= (1 / rows[is_nonzero].mean(axis=1))[:, None]
+    out[index] = rows
@@ -0,0 +1,71 @@
+"""
+Hash of the source code that results depend on, used to find out if saved results were made by other code.
+
+The code of a module is its own source file and the source files of all modules of the same package that it imports,
+directly or through other modules. Imports inside functions are included, since the demos import most modules there.
+So e.g. the code of framdemo.result_extraction also covers framdemo.batch_queries, framdemo.model_cache and
+framdemo.demo_utils (with the settings in it). Modules are found by reading the source files, not by importing them.
+"""
+
+import ast
+import hashlib
+import importlib.util
+from pathlib import Path
+
+
+def get_module_files(module_name: str) -> dict[str, Path]:
+    """Return source file of module and of all modules of its package that it imports (directly or not), by module name."""
+    package = module_name.partition(".")[0]
+    files: dict[str, Path] = dict()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        if name in files:
+            continue
+        spec = importlib.util.find_spec(name)
+        if spec is None or spec.origin is None or not spec.origin.endswith(".py"):
+            message = f"No source file found for module {name}."
+            raise ModuleNotFoundError(message)
+        files[name] = Path(spec.origin)
+        is_package = spec.submodule_search_locations is not None
+        pending.extend(_get_imported_modules(files[name], name, is_package, package))
+    return dict(sorted(files.items()))
+
+
+def get_code_hash(module_names: list[str]) -> str:
+    """Return hash of the source files of modules and of all modules of their packages that they import."""
+    files: dict[str, Path] = dict()
+    for module_name in module_names:
+        files.update(get_module_files(module_name))
+    sha1 = hashlib.sha1()
+    for name, path in sorted(files.items()):
+        sha1.update(name.encode())
+        sha1.update(path.read_bytes())
+    return sha1.hexdigest()
+
+
+def _get_imported_modules(path: Path, module_name: str, is_package: bool, package: str) -> list[str]:
+    """Return names of modules of package imported anywhere in source file of module, with relative imports resolved."""
+    tree = ast.parse(path.read_bytes(), filename=str(path))
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level > 0:
+                parts = module_name.split(".")
+                parent = parts[: len(parts) - node.level + (1 if is_package else 0)]
+                base = ".".join([*parent, base] if base else parent)
+            names.append(base)
+            # from package import module
+            if base.partition(".")[0] == package:
+                names.extend(f"{base}.{alias.name}" for alias in node.names if _is_module(f"{base}.{alias.name}"))
+    return [name for name in names if name.partition(".")[0] == package]
+
+
+def _is_module(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
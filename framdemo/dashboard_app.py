@@ -1,7 +1,7 @@
 """
 Simple demo dashboard app.
 
-This app reads results from HDF5 files and displays them using Streamlit and Plotly.
+This app reads results from result files (HDF5, Parquet or Arrow) and displays them using Streamlit and Plotly.
 Pages are created for price information, regional results, and hydropower information for the demo purpose.
 """
 
@@ -13,26 +13,43 @@ import plotly.graph_objects as go
 import streamlit as st
 
 import framdemo.demo_utils as du
+from framdemo.dashboard_cache import get_result_cache
+from framdemo.downsampling import read_downsampled
+from framdemo.result_store import find_result_store
+from framdemo.volume_catalog import read_volume_catalog
 
-# output file paths
-h5_file_path_prices = du.DEMO_FOLDER / "dashboard_prices.h5"
-h5_file_path_volumes = du.DEMO_FOLDER / "dashboard_volumes.h5"
-h5_file_path_hydro = du.DEMO_FOLDER / "dashboard_hydro.h5"
+# output file paths (without suffix, the most recently written format is read)
+file_path_prices = du.DEMO_FOLDER / "dashboard_prices"
+file_path_volumes = du.DEMO_FOLDER / "dashboard_volumes"
+file_path_hydro = du.DEMO_FOLDER / "dashboard_hydro"
+file_path_detailed_hydro = du.DEMO_FOLDER / "dashboard_detailed_hydro"
 
-if not h5_file_path_prices.exists():
-    message = f"HDF5 file not found at {h5_file_path_prices}"
-    st.error(message)
-    raise FileNotFoundError(message)
+for file_path in [file_path_prices, file_path_volumes, file_path_hydro]:
+    if find_result_store(file_path) is None:
+        message = f"Result file not found at {file_path} (.h5, .parquet or .arrow)"
+        st.error(message)
+        raise FileNotFoundError(message)
 
-if not h5_file_path_volumes.exists():
-    message = f"HDF5 file not found at {h5_file_path_volumes}"
-    st.error(message)
-    raise FileNotFoundError(message)
+# open result stores and series read from them, shared by all reruns of this script and all sessions
+results = get_result_cache()
 
-if not h5_file_path_hydro.exists():
-    message = f"HDF5 file not found at {h5_file_path_hydro}"
-    st.error(message)
-    raise FileNotFoundError(message)
+# rerun the app in this session when result files are written again (e.g. by a new run of demo 7)
+result_file_paths = [file_path_prices, file_path_volumes, file_path_hydro, file_path_detailed_hydro]
+if "result_versions" not in st.session_state:
+    st.session_state.result_versions = results.refresh(result_file_paths)
+
+
+@st.fragment(run_every=du.DASHBOARD_RELOAD_SECONDS)
+def reload_changed_results() -> None:
+    """Check result files and rerun the app if any was written again since this session last read them."""
+    versions = results.refresh(result_file_paths)
+    if versions != st.session_state.result_versions:
+        st.session_state.result_versions = versions
+        st.rerun(scope="app")
+
+
+if du.DASHBOARD_RELOAD_SECONDS:
+    reload_changed_results()
 
 exogen_short = ["FRA", "BEL", "CHE", "LVA", "AUT", "SVK"]
 exogen = ["France", "Belgium", "Czech_Republic", "Latvia", "Austria", "Slovakia"]
@@ -56,19 +73,17 @@ st.sidebar.title("Filters")
 # pages
 
 if menu_option == "Price":
-    # get keys and metadata
-    with pd.HDFStore(h5_file_path_prices, mode="r") as store:
-        keys = store.keys()
-        # keys = [key.lstrip("/") for key in keys]
-        v_attrs = store.root._v_attrs  # noqa: SLF001  # TODO: is there a public method to access this?
-        currency = v_attrs.global_metadata["currency"]
-        model_year = v_attrs.global_metadata["model_year"]
-        weather_years = v_attrs.global_metadata["weather_years"]
-        time_resolution = v_attrs.global_metadata["time_resolution"]
-
-    # zones = sorted(list(set(key.split("/")[2] for key in keys)))
-    zones = sorted(list(set(key.split("/")[2] for key in keys if key.split("/")[2] not in exogen_short)))
-    solve_names = sorted(list(set(key.split("/")[1] for key in keys)))
+    # get solves, zones and metadata
+    with results.open(file_path_prices) as store:
+        metadata = store.get_metadata()
+        currency = metadata["currency"]
+        model_year = metadata["model_year"]
+        weather_years = metadata["weather_years"]
+        time_resolution = metadata["time_resolution"]
+        solve_names = sorted(store.get_solve_names())
+        solve_zones = {solve_name: store.get_columns(solve_name, "price") for solve_name in solve_names}
+
+    zones = sorted({zone for columns in solve_zones.values() for zone in columns if zone not in exogen_short})
 
     selected_solves = []
     st.sidebar.write("Select solves:")
@@ -82,20 +97,14 @@ if menu_option == "Price":
         if st.sidebar.checkbox(label=zone, value=i == 0):
             selected_zones.append(zone)
 
-    # read data
-    combined_data_list = []
+    # mean prices of all zones for the bar plot, from the summary tables (no daily prices are read)
     yearly_prices = []
-    with pd.HDFStore(h5_file_path_prices, mode="r") as store:
-        if selected_solves:
-            for zone in zones:
-                for solve_name in selected_solves:
-                    store_key = f"/{solve_name}/{zone}"
-                    data_key = f"{solve_name} {zone}"
-                    if store_key in store:
-                        data = store[store_key]
-                        data = data.rename(columns={data.columns[0]: data_key})
-                        combined_data_list.append(data)
-                        yearly_prices.append({"Solve": solve_name, "Zone": zone, "EUR/MWh": float(data.mean().iloc[0])})
+    with results.open(file_path_prices) as store:
+        solve_means = {solve_name: store.read_summary(solve_name, "price").loc["mean"] for solve_name in selected_solves}
+    for zone in zones:
+        for solve_name in selected_solves:
+            if zone in solve_means[solve_name]:
+                yearly_prices.append({"Solve": solve_name, "Zone": zone, "EUR/MWh": float(solve_means[solve_name][zone])})
 
     # yearly prices bar plot
     if yearly_prices:
@@ -112,13 +121,19 @@ if menu_option == "Price":
         fig.update_layout(xaxis={"categoryorder": "sum descending"})
         st.plotly_chart(fig, use_container_width=True)
 
-    # daily prices plot
+    # daily prices plot (daily prices are read only for the selected solves and zones)
     if selected_solves and selected_zones:
-        df = pd.concat(combined_data_list, axis=1)
-        columns = [f"{solve} {zone}" for solve in selected_solves for zone in selected_zones]
-        columns = [c for c in columns if c in df.columns]
-        if columns:
-            df = df[columns]
+        combined_data = dict()
+        with results.open(file_path_prices) as store:
+            for solve_name in selected_solves:
+                solve_selected_zones = [zone for zone in selected_zones if zone in solve_zones[solve_name]]
+                if not solve_selected_zones:
+                    continue
+                data = store.read_table(solve_name, "price", solve_selected_zones)
+                for zone in solve_selected_zones:
+                    combined_data[f"{solve_name} {zone}"] = data[zone]
+        if combined_data:
+            df = pd.DataFrame(combined_data)
             fig = px.line(df, title=f"Price in {model_year}, weather years {weather_years}")
             fig.update_layout(
                 xaxis_title=time_resolution,
@@ -134,101 +149,28 @@ if menu_option == "Price":
 
 
 if menu_option == "Volume":
-    # read data
-    with pd.HDFStore(h5_file_path_volumes, mode="r") as store:
-        production_data = []
-        production_data_tech = []
-        consumption_data = []
-        import_data = []
-        export_data = []
-        solve_names = set()
-
-        for key in store:
-            parts = key.strip("/").split("/")
-            solve_name = parts[0]
-            solve_names.add(solve_name)
-            country = parts[1]
-            category = parts[2] if len(parts) > 2 else None
-            tech = parts[3] if len(parts) > 3 else None
-
-            if "Production/Total" in key:
-                volume = store[key]["volume"].sum()
-                if volume == 0:
-                    continue
-                if country in exogen:
-                    continue
-                production_data.append(
-                    {
-                        "Solve": solve_name,
-                        "Country": country,
-                        "Technology": tech,
-                        "Volume": volume,
-                    },
-                )
-
-            if "Production" in key:
-                tech = parts[3] if len(parts) > 3 else None
-                if tech == "Total":
-                    continue
-                volume = store[key]["volume"].sum()
-                if volume == 0:
-                    continue
-                if country in exogen:
-                    continue
-                production_data_tech.append(
-                    {
-                        "Solve": solve_name,
-                        "Country": country,
-                        "Technology": tech,
-                        "Volume": volume,
-                    },
-                )
-
-            elif "Consumption/Total" in key and "Consumption/TotalConsumption" not in key:
-                volume = store[key]["volume"].sum()
-                if volume == 0:
-                    continue
-                if country in exogen:
-                    continue
-                consumption_data.append(
-                    {
-                        "Solve": solve_name,
-                        "Country": country,
-                        "Category": category,
-                        "Volume": volume,
-                    },
-                )
-
-            elif "Import" in key and "Total" not in key:
-                _, country, _, trade_partner = key.strip("/").split("/")
-                volume = store[key]["volume"].sum()
-                import_data.append(
-                    {
-                        "Solve": solve_name,
-                        "Country": country,
-                        "Trade Partner": trade_partner,
-                        "Volume": volume,
-                    },
-                )
-
-            elif "Export" in key and "Total" not in key:
-                _, country, _, trade_partner = key.strip("/").split("/")
-                volume = store[key]["volume"].sum()
-                export_data.append(
-                    {
-                        "Solve": solve_name,
-                        "Country": country,
-                        "Trade Partner": trade_partner,
-                        "Volume": volume,
-                    },
-                )
-
-    solve_names = sorted(list(solve_names))
-
-    production_df = pd.DataFrame(production_data).drop_duplicates()
-    consumption_df = pd.DataFrame(consumption_data).drop_duplicates()
-    import_df = pd.DataFrame(import_data).drop_duplicates()
-    export_df = pd.DataFrame(export_data).drop_duplicates()
+    # read data (catalog of solve, country, direction and category with yearly volume, no series are read)
+    with results.open(file_path_volumes) as store:
+        catalog = store.cached(("volume_catalog",), lambda: read_volume_catalog(store))
+    catalog = catalog.rename(columns={"solve": "Solve", "country": "Country", "total": "Volume"})
+    solve_names = sorted(catalog["Solve"].unique())
+
+    is_total = catalog["category"] == "Total"
+    is_shown = (catalog["Volume"] != 0) & ~catalog["Country"].isin(exogen)
+    production = catalog["direction"] == "Production"
+    consumption = catalog["direction"] == "Consumption"
+
+    production_df = catalog[production & is_total & is_shown].rename(columns={"category": "Technology"})
+    production_tech_df = catalog[production & ~is_total & is_shown].rename(columns={"category": "Technology"})
+    consumption_df = catalog[consumption & is_total & is_shown].rename(columns={"direction": "Category"})
+    import_df = catalog[(catalog["direction"] == "Import") & ~is_total].rename(columns={"category": "Trade Partner"})
+    export_df = catalog[(catalog["direction"] == "Export") & ~is_total].rename(columns={"category": "Trade Partner"})
+
+    production_df = production_df[["Solve", "Country", "Technology", "Volume"]].drop_duplicates()
+    production_tech_df = production_tech_df[["Solve", "Country", "Technology", "Volume"]]
+    consumption_df = consumption_df[["Solve", "Country", "Category", "Volume"]].drop_duplicates()
+    import_df = import_df[["Solve", "Country", "Trade Partner", "Volume"]].drop_duplicates()
+    export_df = export_df[["Solve", "Country", "Trade Partner", "Volume"]].drop_duplicates()
 
     # may become duplicated due to uncategorized pump or transport loss demand (TODO find out)
     # this gives correct volumes
@@ -282,8 +224,7 @@ if menu_option == "Volume":
     st.plotly_chart(fig)
 
     # stacked production tech bar plot
-    production_tech_df = pd.DataFrame(production_data_tech)
-    production_tech_df = production_tech_df[production_tech_df["Solve"].isin(selected_solves)]
+    production_tech_df = production_tech_df[production_tech_df["Solve"].isin(selected_solves)].copy()
     production_tech_df["Volume"] /= 1000.0
     techs = sorted(list(set(production_tech_df["Technology"])))
     bars = []
@@ -348,10 +289,12 @@ if menu_option == "Hydro":
     # read metadata
     solve_names = set()
     countries = set()
-    with pd.HDFStore(h5_file_path_hydro, mode="r") as store:
-        for key in store.keys():
-            if "production" in key:
-                __, solve, country, category = key.split("/")
+    with results.open(file_path_hydro) as store:
+        hydro_columns = {solve: store.get_columns(solve, "hydro") for solve in store.get_solve_names()}
+    for solve, columns in hydro_columns.items():
+        for column in columns:
+            if "production" in column:
+                country, category = column.split("/")
                 solve_names.add(solve)
                 countries.add(country)
     solve_names = sorted(list(solve_names))
@@ -370,16 +313,19 @@ if menu_option == "Hydro":
         index=countries.index("Norway") if "Norway" in countries else 0,
     )
 
-    # read data
-    with pd.HDFStore(h5_file_path_hydro, mode="r") as store:
-        hydro_data = dict()
-        for category in ["inflow", "production", "reservoir_percentage", "reservoir_capacity"]:
-            hydro_data[category] = dict()
-            for selected_solve in selected_solves:
-                store_key = f"/{selected_solve}/{selected_country}/{category}"
+    # read data (only the columns of the selected country)
+    categories = ["inflow", "production", "reservoir_percentage", "reservoir_capacity"]
+    hydro_data = {category: dict() for category in categories}
+    with results.open(file_path_hydro) as store:
+        for selected_solve in selected_solves:
+            columns = [f"{selected_country}/{category}" for category in categories]
+            columns = [c for c in columns if c in hydro_columns[selected_solve]]
+            table = store.read_table(selected_solve, "hydro", columns)
+            for category in categories:
                 data_key = f"{selected_solve}"
-                with contextlib.suppress(Exception):
-                    hydro_data[category][data_key] = store[store_key]["value"]
+                column = f"{selected_country}/{category}"
+                if column in table:
+                    hydro_data[category][data_key] = table[column]
     for key, value in hydro_data.items():
         hydro_data[key] = pd.DataFrame(data=value)
 
@@ -424,12 +370,15 @@ if menu_option == "Hydro":
         st.plotly_chart(inflow_fig)
 
     # detailed hydro
-    h5_file_path_detailed_hydro = du.DEMO_FOLDER / "dashboard_detailed_hydro.h5"
     modules_df = pd.DataFrame()
-    series_df = pd.DataFrame()
-    with contextlib.suppress(Exception), pd.HDFStore(h5_file_path_detailed_hydro, mode="r") as store:
-        modules_df = store.get("/modules_df")
-        series_df = store.get("/series_df")
+    series_columns = []
+    with contextlib.suppress(Exception), results.open(file_path_detailed_hydro) as store:
+        detailed_solve = store.get_solve_names()[0]
+        # one row per module and type, as in the module table written by demo_7_get_data before it was pivoted
+        modules_df = store.read_table(detailed_solve, "hydro_modules").rename_axis("Module").reset_index()
+        modules_df = modules_df.melt(id_vars="Module", var_name="Type", value_name="Value").dropna()
+        series_columns = store.get_columns(detailed_solve, "hydro_series")
+        num_series_periods = store.get_num_periods(detailed_solve, "hydro_series")
 
     def get_module_name(s: str):
         parts = s.split("_")
@@ -441,7 +390,7 @@ if menu_option == "Hydro":
         modules_df["Name"] = modules_df["Module"].apply(get_module_name)
 
     # add reservoir filter
-    reservoir_keys = [c.replace("ReservoirFilling/", "") for c in series_df.columns if c.startswith("ReservoirFilling")]
+    reservoir_keys = [c.replace("ReservoirFilling/", "") for c in series_columns if c.startswith("ReservoirFilling")]
     reservoir_names = [get_module_name(c) for c in reservoir_keys]
     name_to_key = dict(zip(reservoir_names, reservoir_keys, strict=True))
     selected_reservoir_name = st.sidebar.radio(
@@ -492,7 +441,16 @@ if menu_option == "Hydro":
     # selected reservoir filling
     if selected_reservoirs:
         selected_columns = [f"ReservoirFilling/{name_to_key[name]}" for name in selected_reservoirs]
-        df = series_df[selected_columns].copy()
+        # zoom range, and at most DASHBOARD_MAX_POINTS points per line in it (min/max of buckets of periods if zoomed out)
+        zoom_start, zoom_stop = st.slider(
+            label="Zoom (3-hour blocks)",
+            min_value=0,
+            max_value=num_series_periods,
+            value=(0, num_series_periods),
+        )
+        zoom_stop = max(zoom_stop, zoom_start + 1)
+        with results.open(file_path_detailed_hydro) as store:
+            df = read_downsampled(store, detailed_solve, "hydro_series", selected_columns, zoom_start, zoom_stop, du.DASHBOARD_MAX_POINTS)
 
         capacities = modules_df.copy()
         capacities = capacities[capacities["Name"].isin(selected_reservoirs)]
@@ -0,0 +1,260 @@
+"""
+Cache of result stores and tables read by the dashboard, shared by all reruns and sessions of the Streamlit app.
+
+Streamlit reruns the whole dashboard script on every widget interaction. Without a cache, every rerun opens the result
+files again and reads every shown series from disk. ResultCache keeps:
+
+- one open store per result file, reopened when the file is written again (its modification time changes). The
+  replaced store is closed when the last view that uses it (e.g. in another session) is closed,
+- columns of tables already read, keyed by (file path, modification time, solve, metric, column), so e.g. selecting
+  one more zone on the Price page only reads that zone. Cached columns are evicted least recently used first
+  when they use more than DASHBOARD_CACHE_MAX_BYTES (set in demo_utils).
+
+Use get_result_cache to get the cache, and ResultCache.open in place of open_result_store. The cache lives as long as
+the Streamlit server process, so when the dashboard is run as a server (demo_8_run_dashboard with server=True), all
+browser sessions share one copy of the results. ResultCache.refresh is used by the dashboard to find result files that
+were written again, e.g. by a new run of demo_7_get_data, and reload them in all sessions.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from numpy.typing import NDArray
+
+import framdemo.demo_utils as du
+from framdemo.result_store import (
+    ResultStore,
+    find_result_store,
+    get_result_store_mtime,
+    open_result_store,
+)
+from framdemo.result_summary import read_summary
+
+
+@st.cache_resource
+def get_result_cache() -> "ResultCache":
+    """Return the ResultCache shared by all reruns and sessions of the dashboard."""
+    return ResultCache(du.DASHBOARD_CACHE_MAX_BYTES)
+
+
+class ResultCache:
+    """Open result stores and an LRU cache of table columns and small objects (metadata, column names) read from them."""
+
+    def __init__(self, max_bytes: int) -> None:
+        """Create empty cache that keeps at most max_bytes of table columns."""
+        self._max_bytes = max_bytes
+        self.lock = threading.RLock()  # held while using the shared stores, which may not support concurrent reads
+        self._stores: dict[Path, _OpenStore] = dict()
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self._num_bytes = 0
+
+    def open(self, path: Path) -> "CachedResultStore":
+        """Return read-only view of the most recently written result store for path without suffix (as open_result_store)."""
+        found = find_result_store(path)
+        if found is None:
+            message = f"No result store found for {path}."
+            raise FileNotFoundError(message)
+        store_path, store_format = found
+        file_key = (store_path, get_result_store_mtime(store_path))
+        with self.lock:
+            if path not in self._stores or self._stores[path].file_key != file_key:
+                self._replace_store(path)
+                self._stores[path] = _OpenStore(file_key, open_result_store(path, "r", store_format))
+            opened = self._stores[path]
+            opened.num_views += 1
+            return CachedResultStore(self, opened, file_key)
+
+    def refresh(self, paths: list[Path]) -> tuple:
+        """
+        Return current version (file path and modification time, or None if missing) of result stores for paths without suffix.
+
+        Stores that were written again since they were opened are replaced, and values read from them are removed,
+        so all sessions get the new results on their next open. Views that still use a replaced store can read from it
+        until they are closed.
+        """
+        versions = []
+        for path in paths:
+            found = find_result_store(path)
+            file_key = None if found is None else (found[0], get_result_store_mtime(found[0]))
+            with self.lock:
+                if path in self._stores and self._stores[path].file_key != file_key:
+                    self._replace_store(path)
+            versions.append(file_key)
+        return tuple(versions)
+
+    def lookup(self, key: Hashable) -> object | None:
+        """Return cached value for key and mark it as recently used, or None if it is not cached."""
+        with self.lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: object, num_bytes: int = 0) -> None:
+        """Cache value for key. num_bytes is counted against the memory budget."""
+        with self.lock:
+            if key in self._entries:
+                self._num_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, num_bytes)
+            self._num_bytes += num_bytes
+            self._evict()
+
+    def get(self, key: Hashable, load: Callable[[], object]) -> object:
+        """Return cached value for key, or load and cache it (not counted against the memory budget). Values must not be changed by the caller."""
+        with self.lock:
+            value = self.lookup(key)
+            if value is None:
+                value = load()
+                self.put(key, value)
+            return value
+
+    def clear(self) -> None:
+        """Close all stores (stores still used by views when they are released) and remove all cached values."""
+        with self.lock:
+            for path in list(self._stores):
+                self._replace_store(path)
+            self._entries.clear()
+            self._num_bytes = 0
+
+    def get_num_bytes(self) -> int:
+        """Return number of bytes used by cached table columns."""
+        return self._num_bytes
+
+    def release(self, opened: "_OpenStore") -> None:
+        """Release store used by a view that is closed. The store is closed if it was replaced and no other view uses it."""
+        with self.lock:
+            opened.num_views -= 1
+            if opened.is_replaced and opened.num_views == 0:
+                self._close_store(opened)
+
+    def _replace_store(self, path: Path) -> None:
+        """Stop using store for path in new views, and close it if no view uses it."""
+        if path not in self._stores:
+            return
+        opened = self._stores.pop(path)
+        opened.is_replaced = True
+        self._remove_entries(opened.file_key)
+        if opened.num_views == 0:
+            self._close_store(opened)
+
+    def _close_store(self, opened: "_OpenStore") -> None:
+        opened.store.close()
+        # values read by the last views of the store after it was replaced
+        self._remove_entries(opened.file_key)
+
+    def _remove_entries(self, file_key: tuple[Path, float]) -> None:
+        """Remove values read from the file version file_key, so they do not wait for eviction."""
+        for key in [key for key in self._entries if isinstance(key, tuple) and key[0] == file_key]:
+            self._num_bytes -= self._entries.pop(key)[1]
+
+    def _evict(self) -> None:
+        """Remove least recently used values until cached columns fit in max_bytes (the newest value is always kept)."""
+        while self._num_bytes > self._max_bytes and len(self._entries) > 1:
+            __, (__, size) = self._entries.popitem(last=False)
+            self._num_bytes -= size
+
+
+class _OpenStore:
+    """Store opened by ResultCache for one version of a result file, with the number of views that use it."""
+
+    def __init__(self, file_key: tuple[Path, float], store: ResultStore) -> None:
+        self.file_key = file_key
+        self.store = store
+        self.num_views = 0
+        self.is_replaced = False
+
+
+class CachedResultStore(ResultStore):
+    """
+    Read-only result store that reads through a ResultCache.
+
+    Closing it releases the shared store, which stays open for other views, and is closed by the cache once it is replaced
+    by a newer version of the file and no view uses it.
+    """
+
+    def __init__(self, cache: ResultCache, opened: _OpenStore, file_key: tuple[Path, float]) -> None:
+        """Wrap store opened by cache. file_key (path, modification time) is the start of all cache keys for this store."""
+        self._cache = cache
+        self._opened = opened
+        self._store = opened.store
+        self._file_key = file_key
+        self._is_closed = False
+
+    def close(self) -> None:
+        """Release the shared store."""
+        if not self._is_closed:
+            self._is_closed = True
+            self._cache.release(self._opened)
+
+    def set_metadata(self, metadata: dict) -> None:
+        """Not supported, the store is read-only."""
+        message = "CachedResultStore is read-only."
+        raise PermissionError(message)
+
+    def write_table(self, solve_name: str, metric: str, columns: list[str], values: NDArray, index: list[str] | None = None) -> None:
+        """Not supported, the store is read-only."""
+        message = "CachedResultStore is read-only."
+        raise PermissionError(message)
+
+    def get_metadata(self) -> dict:
+        """Return metadata common for all solves."""
+        return self.cached(("metadata",), self._store.get_metadata)
+
+    def get_solve_names(self) -> list[str]:
+        """Return names of solves in store."""
+        return list(self.cached(("solve_names",), self._store.get_solve_names))
+
+    def get_metrics(self, solve_name: str) -> list[str]:
+        """Return metrics stored for solve."""
+        return list(self.cached(("metrics", solve_name), lambda: self._store.get_metrics(solve_name)))
+
+    def has_table(self, solve_name: str, metric: str) -> bool:
+        """Return True if store has table for solve and metric."""
+        return self.cached(("has_table", solve_name, metric), lambda: self._store.has_table(solve_name, metric))
+
+    def get_columns(self, solve_name: str, metric: str) -> list[str]:
+        """Return column names of table for solve and metric, in the order they were written."""
+        return list(self.cached(("columns", solve_name, metric), lambda: self._store.get_columns(solve_name, metric)))
+
+    def get_num_periods(self, solve_name: str, metric: str) -> int:
+        """Return number of periods (rows) of table for solve and metric."""
+        return self.cached(("num_periods", solve_name, metric), lambda: self._store.get_num_periods(solve_name, metric))
+
+    def read_table(self, solve_name: str, metric: str, columns: list[str] | None = None) -> pd.DataFrame:
+        """Return table for solve and metric with the given columns. Only columns that are not cached are read from the store."""
+        if columns is None:
+            columns = self.get_columns(solve_name, metric)
+
+        keys = {name: (self._file_key, "column", solve_name, metric, name) for name in columns}
+        series = {name: self._cache.lookup(keys[name]) for name in columns}
+        missing = [name for name in columns if series[name] is None]
+        if missing or not columns:
+            with self._cache.lock:
+                table = self._store.read_table(solve_name, metric, missing)
+            if not columns:
+                return table
+            for name in missing:
+                # copy, so the cached column does not keep the whole table in memory
+                series[name] = table[name].copy()
+                self._cache.put(keys[name], series[name], int(series[name].memory_usage(index=False)))
+
+        # new DataFrame, so callers can change it without changing cached columns
+        return pd.DataFrame(series, columns=columns)
+
+    def read_summary(self, solve_name: str, metric: str) -> pd.DataFrame:
+        """
+        Return summary table of solve and metric with all columns (see result_summary.read_summary).
+
+        The table is read once per file version. If the store has no summary table, it is computed once from the result table,
+        without keeping the full series in the cache.
+        """
+        return self.cached(("summary", solve_name, metric), lambda: read_summary(self._store, solve_name, metric))
+
+    def cached(self, key: tuple, load: Callable[[], object]) -> object:
+        """Return value derived from this store (e.g. a table built from its metadata), loaded once per file version. It must not be changed."""
+        with self._cache.lock:
+            return self._cache.get((self._file_key, *key), load)
@@ -0,0 +1,184 @@
+"""
+Content-addressed cache of downloaded datasets shared across demo folders.
+
+Each cache entry holds one extracted dataset and is keyed by Zenodo record id and file checksum.
+Entries are linked into the database folder of each demo folder (see link_tree), so many demo folders
+can use the same dataset without a private copy each. Least recently used entries are evicted when the
+cache grows above its size budget, and a file lock per entry makes sure concurrent runs download a record only once.
+Entries that are symlinked into a demo folder (link mode "symlink") are not evicted while the links exist.
+"""
+
+import json
+import os
+import shutil
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from framcore.events import send_info_event, send_warning_event
+
+from framdemo.file_lock import FileLock
+
+LINK_MODES = ["reflink", "hardlink", "symlink", "copy"]
+
+_FICLONE = 0x40049409  # linux ioctl to clone a file on copy-on-write filesystems (btrfs, xfs)
+
+
+class DatasetCache:
+    """Shared folder of extracted datasets keyed by (record id, checksum)."""
+
+    _DATA_FOLDER = "dataset"
+    _INFO_FILE = "info.json"
+
+    def __init__(self, folder: Path, max_bytes: int | None = None) -> None:
+        """Create cache in folder. Evict least recently used entries when total size is above max_bytes (None means no limit)."""
+        self._folder = Path(folder)
+        self._max_bytes = max_bytes
+        self._folder.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(record_id: str, checksum: str) -> str:
+        """Return cache key for a record file with checksum on the form 'md5:<hexdigest>'."""
+        algorithm, __, digest = checksum.partition(":")
+        return f"{record_id}-{algorithm}-{digest}"
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Hold an exclusive lock for key across processes. Blocks until the lock is available."""
+        with FileLock(self._folder / f"{key}.lock") as lock:
+            lock.acquire(poll_seconds=1.0)
+            yield
+
+    def get_entry(self, key: str) -> Path | None:
+        """Return dataset folder for key and mark it as recently used, or None if key is not in cache. Hold lock(key) when calling this."""
+        entry = self._folder / key
+        if not (entry / self._INFO_FILE).is_file():
+            return None
+        os.utime(entry / self._INFO_FILE)
+        return entry / self._DATA_FOLDER
+
+    def get_staging_folder(self, key: str) -> Path:
+        """Return folder to download and extract dataset for key into. Content from an interrupted earlier attempt is kept so downloads can resume."""
+        staging = self._folder / f"{key}.partial" / self._DATA_FOLDER
+        staging.mkdir(parents=True, exist_ok=True)
+        return staging
+
+    def commit(self, key: str) -> Path:
+        """Move staging folder for key into the cache and return the dataset folder. Hold lock(key) when calling this."""
+        partial = self._folder / f"{key}.partial"
+        num_bytes = sum(p.stat().st_size for p in (partial / self._DATA_FOLDER).rglob("*") if p.is_file())
+        with (partial / self._INFO_FILE).open("w") as f:
+            json.dump({"key": key, "num_bytes": num_bytes}, f)
+        entry = self._folder / key
+        if entry.exists():
+            shutil.rmtree(entry)  # left over from an incomplete eviction
+        partial.replace(entry)
+        return self._folder / key / self._DATA_FOLDER
+
+    def add_symlinks(self, key: str, folder: Path) -> None:
+        """Record that folder has symlinks into the entry for key, so the entry is not evicted while they exist. Hold lock(key) when calling this."""
+        info_path = self._folder / key / self._INFO_FILE
+        with info_path.open("r") as f:
+            info = json.load(f)
+        folders = set(info.get("symlinked_to", []))
+        folders.add(str(Path(folder).resolve()))
+        info["symlinked_to"] = sorted(folders)
+        tmp_path = info_path.with_name(info_path.name + ".tmp")
+        with tmp_path.open("w") as f:
+            json.dump(info, f)
+        tmp_path.replace(info_path)
+
+    def evict(self, keep: set[str]) -> None:
+        """
+        Delete least recently used entries until the cache is within its size budget.
+
+        Entries in keep, entries locked by other runs and entries that are still symlinked into a demo folder are not deleted.
+        """
+        if self._max_bytes is None:
+            return
+        entries = []
+        for info_path in self._folder.glob(f"*/{self._INFO_FILE}"):
+            try:
+                with info_path.open("r") as f:
+                    info = json.load(f)
+                entries.append((info_path.stat().st_mtime, info_path.parent.name, info["num_bytes"], info.get("symlinked_to", [])))
+            except (OSError, ValueError, KeyError):
+                continue
+        total = sum(num_bytes for __, __, num_bytes, __ in entries)
+        for __, key, num_bytes, symlinked_to in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            if key in keep:
+                continue
+            linking_folders = [folder for folder in symlinked_to if _has_symlinks_into(Path(folder), self._folder / key)]
+            if linking_folders:
+                send_warning_event(self, f"Not evicting dataset {key} from cache {self._folder} because it is symlinked into {linking_folders}.")
+                continue
+            with FileLock(self._folder / f"{key}.lock") as lock:
+                if not lock.try_acquire():
+                    continue
+                send_info_event(self, f"Evicting dataset {key} ({num_bytes / 1024**3:.1f} GB) from cache {self._folder}")
+                shutil.rmtree(self._folder / key, ignore_errors=True)
+            total -= num_bytes
+
+
+def link_tree(src: Path, dst: Path, mode: str) -> None:
+    """
+    Make the content of folder src available in folder dst.
+
+    mode is one of:
+    - "reflink": copy-on-write clone of each file where the filesystem supports it, otherwise copy.
+    - "hardlink": hard link each file where possible, otherwise copy. Files are shared, so they must not be edited in place.
+    - "symlink": symlink each top level item of src. Files are shared, and links break if src is deleted
+      (register dst with DatasetCache.add_symlinks so that the cache entry is not evicted).
+    - "copy": plain copy.
+    """
+    if mode not in LINK_MODES:
+        message = f"Unsupported link mode {mode}. Expected one of {LINK_MODES}."
+        raise ValueError(message)
+    dst.mkdir(parents=True, exist_ok=True)
+
+    if mode == "symlink":
+        try:
+            for path in src.iterdir():
+                (dst / path.name).symlink_to(path.resolve(), target_is_directory=path.is_dir())
+            return
+        except OSError as e:
+            send_warning_event(link_tree, f"Could not symlink {src} into {dst} ({e}). Copying instead.")
+            for path in dst.iterdir():
+                if path.is_symlink():
+                    path.unlink()
+            mode = "copy"
+
+    link_file = {"reflink": _reflink_file, "hardlink": _hardlink_file, "copy": shutil.copy2}[mode]
+    shutil.copytree(src, dst, copy_function=link_file, dirs_exist_ok=True)
+
+
+def _has_symlinks_into(folder: Path, target: Path) -> bool:
+    """Return True if folder has a top level symlink into target."""
+    if not folder.is_dir():
+        return False
+    target = target.resolve()
+    return any(path.is_symlink() and target in Path(os.readlink(path)).parents for path in folder.iterdir())
+
+
+def _hardlink_file(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)  # e.g. src and dst on different devices
+
+
+def _reflink_file(src: str, dst: str) -> None:
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        try:
+            with Path(src).open("rb") as fsrc, Path(dst).open("wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass  # filesystem without copy-on-write support
+    shutil.copy2(src, dst)
@@ -1,3 +1,7 @@
+from framdemo.tracing import span
+
+
+@span()
 def demo_10_watershed(num_cpu_cores: int) -> None:
     """
     Optimize a single watershed against a price.
@@ -1,46 +1,68 @@
+import bisect
+import hashlib
+import io
+import json
+import os
+import shutil
 import sys
+import threading
+import time
 import zipfile
+from collections.abc import Callable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from functools import partial
 from pathlib import Path
+from typing import BinaryIO
 from uuid import uuid4
 
 import requests
 from framcore.events import send_error_event, send_info_event, send_warning_event
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import framdemo.demo_utils as du
+from framdemo.dataset_cache import DatasetCache, link_tree
+from framdemo.tracing import span
 
 
+@span()
 def demo_1_download_dataset() -> None:
     """
     Download the FRAM demo dataset from zenodo to the demo folder and unzip zip files.
 
     1. Dataset zip file is downloaded from https://doi.org/10.5281/zenodo.17294466 using REST api.
+       The file is fetched as byte range segments over parallel connections (see du.DOWNLOAD_NUM_CONNECTIONS).
+       Finished segments are recorded in a manifest next to the zip file, so an interrupted download resumes
+       where it stopped. The checksum from Zenodo is verified while the download is running.
     2. File is unzipped in the dataset folder. The file is unzipped in such a way that it skips the first directory level, so all the db_xx directories should
        be placed in the same folder as the zip file was downloaded to.
     3. Zip file is deleted.
 
+    If du.DATASET_CACHE is set, the dataset is downloaded into a cache shared by all demo folders (unless it is already there),
+    and linked into the demo folder according to du.DATASET_LINK_MODE.
+
+    If du.DOWNLOAD_PIPELINED_UNZIP is True, steps 1-3 overlap: members are extracted as soon as their bytes are downloaded,
+    and downloaded segments are deleted as soon as all members in them are extracted.
+
     """
     if du.DATASET_SOURCE is not None:
         assert isinstance(du.DATASET_SOURCE, Path) and du.DATASET_SOURCE.is_dir()
-        import os
-        import shutil
-        from time import time
-
-        t = time()
-        send_info_event(demo_1_download_dataset, "downloading dataset")
-        os.makedirs(du.DEMO_FOLDER / "database", exist_ok=False)
-        for name in os.listdir(du.DATASET_SOURCE):
-            path = du.DATASET_SOURCE / name
-            send_info_event(demo_1_download_dataset, f"{path}")
-            if path.is_dir():
-                shutil.copytree(src=path, dst=du.DEMO_FOLDER / "database" / name)
-            else:
-                shutil.copyfile(src=path, dst=du.DEMO_FOLDER / "database" / name)
-        send_info_event(demo_1_download_dataset, f"time download dataset {round(time() - t, 3)} seconds")
+
+        send_info_event(demo_1_download_dataset, f"downloading dataset from {du.DATASET_SOURCE} (link mode {du.DATASET_LINK_MODE})")
+        with span("link dataset"):
+            os.makedirs(du.DEMO_FOLDER / "database", exist_ok=False)
+            link_tree(du.DATASET_SOURCE, du.DEMO_FOLDER / "database", du.DATASET_LINK_MODE)
         return
 
     local_dataset_folder: Path = du.DEMO_FOLDER / "database"
 
-    if local_dataset_folder.is_dir() and list(local_dataset_folder.iterdir()):
+    if local_dataset_folder.is_dir() and list(local_dataset_folder.iterdir()) and not _has_download_in_progress(local_dataset_folder):
         send_warning_event(demo_1_download_dataset, f"Skipping download because there is already data in {local_dataset_folder}")
         return
 
@@ -55,7 +77,7 @@ def demo_1_download_dataset() -> None:
     user_agent = f"fram-demo-{uuid4()}"
     response = requests.get(api_url, headers={"User-Agent": user_agent})
 
-    if response.status_code != 200:  # noqa: PLR2004
+    if response.status_code != 200:
         message = f"Failed to get dataset metadata from Zenodo. Status code: {response.status_code}, Response text: {response.text}"
         send_error_event(sender=demo_1_download_dataset, message=message, exception_type_name="DownloadError", traceback="")
         raise RuntimeError(message)
@@ -74,11 +96,12 @@ def demo_1_download_dataset() -> None:
                 continue
             file_url = zenodo_url + file_url.split(zenodo_url + "api/")[1]
             file_path: Path = local_dataset_folder / file_info["key"]
-            if file_path.exists() and zipfile.is_zipfile(str(file_path)):  # for if the file already exists as a valid zip file.
+            # for if the file already exists as a valid zip file (and is not a partial download).
+            if file_path.exists() and not _is_download_in_progress(file_path) and zipfile.is_zipfile(str(file_path)):
                 existing_files.append(file_path)
                 send_info_event(demo_1_download_dataset, f"Existing file {file_path} exists and is a valid zipfile. Skipping download.")
                 continue
-            files_to_download.append((file_url, file_path))
+            files_to_download.append((file_url, file_path, file_info.get("checksum")))
             break
     except Exception as e:
         message = f"An exception occured during processing of dataset metadata: {e}"
@@ -90,82 +113,641 @@ def demo_1_download_dataset() -> None:
         send_error_event(sender=demo_1_download_dataset, message=message,  exception_type_name="DownloadError", traceback="")
         raise RuntimeError(message)
 
-    for file_url, file_path in files_to_download:
+    if du.DATASET_CACHE is not None and _get_dataset_using_cache(dataset_id, files_to_download, local_dataset_folder, user_agent):
+        return
+
+    _download_files(files_to_download, local_dataset_folder, user_agent)
+
+
+def _download_files(files_to_download: list[tuple[str, Path, str | None]], dataset_folder: Path, user_agent: str) -> None:
+    with _create_session(user_agent) as session:
+        for file_url, file_path, checksum in files_to_download:
+            if file_path.exists() and not _is_download_in_progress(file_path) and zipfile.is_zipfile(str(file_path)):
+                continue
+            try:
+                with span("download dataset", file=file_path.name):
+                    if du.DOWNLOAD_PIPELINED_UNZIP:
+                        _download_and_unzip_file(session, file_url, file_path, checksum, dataset_folder)
+                    else:
+                        _download_file(session, file_url, file_path, checksum)
+            except requests.exceptions.RequestException as e:
+                message = f"An exception occured during processing of dataset: {e}"
+                send_error_event(sender=demo_1_download_dataset, message=message, exception_type_name=str(type(e)), traceback=e.__traceback__)
+                raise RuntimeError(message) from e
+
+    send_info_event(demo_1_download_dataset, "Dataset download finished.")
+    with span("unzip dataset"):
+        _unzip_files_in_folder(dataset_folder)
+
+
+def _get_dataset_using_cache(
+    dataset_id: str,
+    files_to_download: list[tuple[str, Path, str | None]],
+    dataset_folder: Path,
+    user_agent: str,
+) -> bool:
+    """Download dataset into du.DATASET_CACHE unless already there, and link it into dataset_folder. Return False if the cache cannot be used."""
+    if len(files_to_download) != 1 or files_to_download[0][2] is None:
+        send_warning_event(_get_dataset_using_cache, "Dataset file has no checksum to use as cache key. Downloading without cache.")
+        return False
+
+    file_url, file_path, checksum = files_to_download[0]
+    cache = DatasetCache(du.DATASET_CACHE, du.DATASET_CACHE_MAX_BYTES)
+    key = DatasetCache.get_key(dataset_id, checksum)
+
+    send_info_event(_get_dataset_using_cache, f"Waiting for lock on dataset {key} in cache {du.DATASET_CACHE}")
+    with cache.lock(key):
+        cached_dataset_folder = cache.get_entry(key)
+        if cached_dataset_folder is None:
+            staging_folder = cache.get_staging_folder(key)
+            _download_files([(file_url, staging_folder / file_path.name, checksum)], staging_folder, user_agent)
+            cached_dataset_folder = cache.commit(key)
+        else:
+            send_info_event(_get_dataset_using_cache, f"Found dataset {key} in cache. Skipping download.")
+
+        t = time.time()
+        link_tree(cached_dataset_folder, dataset_folder, du.DATASET_LINK_MODE)
+        seconds = round(time.time() - t, 3)
+        send_info_event(_get_dataset_using_cache, f"Linked dataset into {dataset_folder} (link mode {du.DATASET_LINK_MODE}) in {seconds} seconds")
+        if du.DATASET_LINK_MODE == "symlink":
+            cache.add_symlinks(key, dataset_folder)
+
+    cache.evict(keep={key})
+    return True
+
+
+_MANIFEST_SUFFIX = ".manifest.json"
+_CHUNK_SIZE = 1024 * 1024
+_MAX_SEGMENT_ATTEMPTS = 5
+
+
+def _create_session(user_agent: str) -> requests.Session:
+    session = requests.Session()
+    # byte ranges refer to the stored file, so ask the server not to compress the response
+    session.headers.update({"User-Agent": user_agent, "Accept-Encoding": "identity"})
+    retry = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_maxsize=max(du.DOWNLOAD_NUM_CONNECTIONS, 1), max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _get_manifest_path(file_path: Path) -> Path:
+    return file_path.with_name(file_path.name + _MANIFEST_SUFFIX)
+
+
+def _is_download_in_progress(path: Path) -> bool:
+    return path.name.endswith(_MANIFEST_SUFFIX) or _get_manifest_path(path).exists()
+
+
+def _has_download_in_progress(folder: Path) -> bool:
+    return any(path.name.endswith(_MANIFEST_SUFFIX) for path in folder.iterdir())
+
+
+def _read_manifest(manifest_path: Path, total: int, segment_size: int, checksum: str | None, layout: str) -> set[int] | None:
+    """Return start of finished segments, or None if there is no usable manifest for this download."""
+    try:
+        with manifest_path.open("r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get("total"), manifest.get("segment_size"), manifest.get("checksum"), manifest.get("layout")) != (total, segment_size, checksum, layout):
+        return None
+    return set(manifest.get("done", []))
+
+
+def _write_manifest(manifest_path: Path, total: int, segment_size: int, checksum: str | None, layout: str, done: set[int]) -> None:
+    manifest = {"total": total, "segment_size": segment_size, "checksum": checksum, "layout": layout, "done": sorted(done)}
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with tmp_path.open("w") as f:
+        json.dump(manifest, f)
+    tmp_path.replace(manifest_path)
+
+
+def _get_remote_size(session: requests.Session, file_url: str) -> int | None:
+    """Return size of remote file, or None if the server does not support byte range requests."""
+    with session.get(file_url, headers={"Range": "bytes=0-0"}, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code != 206 or "/" not in content_range:
+            return None
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+
+
+def _download_file(session: requests.Session, file_url: str, file_path: Path, checksum: str | None) -> None:
+    total = _get_remote_size(session, file_url)
+    if total is None:
+        send_info_event(_download_file, f"Server does not support byte ranges. Downloading {file_path.name} over a single connection.")
+        _download_file_single(session, file_url, file_path, checksum)
+        return
+
+    segment_size = max(du.DOWNLOAD_SEGMENT_SIZE, _CHUNK_SIZE)
+    segments = [(start, min(start + segment_size, total)) for start in range(0, total, segment_size)]
+
+    manifest_path = _get_manifest_path(file_path)
+    done = _read_manifest(manifest_path, total, segment_size, checksum, layout="file")
+    if done is None or not file_path.is_file() or file_path.stat().st_size != total:
+        done = set()
+        with file_path.open("wb") as f:
+            f.truncate(total)
+        _write_manifest(manifest_path, total, segment_size, checksum, "file", done)
+    elif done:
+        send_info_event(_download_file, f"Resuming download of {file_path.name}. {len(done)} of {len(segments)} segments already downloaded.")
+
+    progress = _DownloadProgress(file_path.name, total, sum(end - start for start, end in segments if start in done))
+    verifier = _ChecksumVerifier(checksum)
+    stop = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=max(du.DOWNLOAD_NUM_CONNECTIONS, 1)) as pool:
+        futures = [pool.submit(_fetch_segment, session, file_url, start, end, file_path, start, progress, stop) for start, end in segments if start not in done]
         try:
-            # Download the file with simple progress output
-            with requests.get(file_url, stream=True, headers={"User-Agent": user_agent}) as request:
-                request.raise_for_status()
-                total = int(request.headers.get("Content-Length", 0))
-                downloaded = 0
-                chunk_size = 8192
-
-                with file_path.open(mode="wb") as file:
-                    for chunk in request.iter_content(chunk_size=chunk_size):
-                        if not chunk:
-                            continue
+            num_hashed = 0
+            for future in as_completed(futures):
+                done.add(future.result())
+                _write_manifest(manifest_path, total, segment_size, checksum, "file", done)
+
+                # hash the finished prefix of the file while later segments are still downloading
+                while num_hashed < len(segments) and segments[num_hashed][0] in done:
+                    num_hashed += 1
+                if num_hashed:
+                    with file_path.open("rb") as f:
+                        verifier.update_from_stream(f, segments[num_hashed - 1][1])
+        except BaseException:
+            stop.set()
+            raise
+
+    progress.finish()
+    with file_path.open("rb") as f:
+        verifier.update_from_stream(f, total)
+    verifier.verify(file_path.name, file_path, manifest_path)
+    manifest_path.unlink()
+
+
+def _fetch_segment(
+    session: requests.Session,
+    file_url: str,
+    start: int,
+    end: int,
+    target_path: Path,
+    target_offset: int,
+    progress: "_DownloadProgress",
+    stop: threading.Event,
+) -> int:
+    """Download bytes [start, end) of file_url into target_path from target_offset. Retry from current position on connection errors."""
+    position = start
+    attempt = 0
+    with target_path.open("r+b") as file:
+        file.seek(target_offset)
+        while position < end:
+            try:
+                with session.get(file_url, headers={"Range": f"bytes={position}-{end - 1}"}, stream=True, timeout=60) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        message = f"Server ignored byte range request for {file_url}. Status code: {response.status_code}"
+                        raise requests.exceptions.HTTPError(message, response=response)
+                    for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                        if stop.is_set():
+                            return start
+                        chunk = chunk[: end - position]
                         file.write(chunk)
-                        downloaded += len(chunk)
-
-                        # Create progress message
-                        if total:
-                            percent = downloaded * 100 // total
-                            mb_downloaded = downloaded / (1024 * 1024)
-                            mb_total = total / (1024 * 1024)
-                            msg = f"\r\033[KDownloading {file_path.name}: {percent:3d}% ({mb_downloaded:.1f}/{mb_total:.1f} MB)"
-                        else:
-                            mb_downloaded = downloaded / (1024 * 1024)
-                            msg = f"\r\033[KDownloading {file_path.name}: {mb_downloaded:.1f} MB"
-                        sys.stdout.write(msg)
-                        sys.stdout.flush()
+                        position += len(chunk)
+                        progress.add(len(chunk))
+                        if position >= end:
+                            break
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.exceptions.Timeout):
+                attempt += 1
+                if attempt >= _MAX_SEGMENT_ATTEMPTS:
+                    raise
+                time.sleep(2**attempt)
+    return start
+
+
+def _download_file_single(session: requests.Session, file_url: str, file_path: Path, checksum: str | None) -> None:
+    verifier = _ChecksumVerifier(checksum)
+    with session.get(file_url, stream=True, timeout=60) as request:
+        request.raise_for_status()
+        progress = _DownloadProgress(file_path.name, int(request.headers.get("Content-Length", 0)), 0)
+        with file_path.open(mode="wb") as file:
+            for chunk in request.iter_content(chunk_size=_CHUNK_SIZE):
+                if not chunk:
+                    continue
+                file.write(chunk)
+                verifier.update(chunk)
+                progress.add(len(chunk))
+        progress.finish()
+    verifier.verify(file_path.name, file_path)
+
+
+def _download_and_unzip_file(session: requests.Session, file_url: str, file_path: Path, checksum: str | None, dataset_folder: Path) -> None:
+    """
+    Download file_path and extract its members while the download is running.
+
+    Segments are stored as separate part files, and the tail segment (with the zip central directory) is fetched first.
+    A member is extracted as soon as all segments holding its bytes are downloaded, and a part file is deleted as soon as
+    all members overlapping it are extracted. Peak disk use is therefore the extracted dataset plus a few segments,
+    instead of the extracted dataset plus the whole zip file.
+    """
+    total = _get_remote_size(session, file_url)
+    if total is None:
+        send_info_event(_download_and_unzip_file, "Server does not support byte ranges. Unzipping after download instead.")
+        _download_file_single(session, file_url, file_path, checksum)
+        return
+
+    segment_size = max(du.DOWNLOAD_SEGMENT_SIZE, _CHUNK_SIZE)
+    segments = [(start, min(start + segment_size, total)) for start in range(0, total, segment_size)]
+    parts_folder = file_path.with_name(file_path.name + ".parts")
+
+    manifest_path = _get_manifest_path(file_path)
+    done = _read_manifest(manifest_path, total, segment_size, checksum, layout="parts")
+    if done is None:
+        shutil.rmtree(parts_folder, ignore_errors=True)
+        parts_folder.mkdir(parents=True)
+        done = set()
+        _write_manifest(manifest_path, total, segment_size, checksum, "parts", done)
+    elif done:
+        send_info_event(_download_and_unzip_file, f"Resuming download of {file_path.name}. {len(done)} of {len(segments)} segments already downloaded.")
+
+    # parts of earlier runs may already be extracted and deleted, then the whole file checksum cannot be computed,
+    # but the expected checksum is still written to the manifest so that later runs can resume
+    verified_checksum = checksum
+    if any(not _get_part_path(parts_folder, start).exists() for start in done):
+        send_info_event(_download_and_unzip_file, "Parts of the zip file were deleted by an earlier run. Only CRC of zip members will be verified.")
+        verified_checksum = None
+
+    progress = _DownloadProgress(file_path.name, total, sum(end - start for start, end in segments if start in done))
+    pipeline = _PipelinedUnzip(parts_folder, segments, done, _ChecksumVerifier(verified_checksum))
+    stop = threading.Event()
+
+    with (
+        ThreadPoolExecutor(max_workers=max(du.DOWNLOAD_NUM_CONNECTIONS, 1)) as pool,
+        _ZipExtractor(pipeline.open_archive, dataset_folder) as extractor,
+    ):
+        downloads = set()
+        for start, end in segments[-1:] + segments[:-1]:
+            if start in done:
+                continue
+            part_path = _get_part_path(parts_folder, start)
+            part_path.touch()
+            downloads.add(pool.submit(_fetch_segment, session, file_url, start, end, part_path, 0, progress, stop))
+
+        try:
+            extractions = pipeline.update(extractor)
+            while downloads or extractions:
+                finished, _ = wait(downloads | extractions.keys(), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in downloads:
+                        downloads.remove(future)
+                        done.add(future.result())
+                        _write_manifest(manifest_path, total, segment_size, checksum, "parts", done)
+                    else:
+                        future.result()
+                        pipeline.set_extracted(extractions.pop(future))
+                extractions.update(pipeline.update(extractor))
+        except BaseException:
+            stop.set()
+            raise
+
+    progress.finish()
+    pipeline.verify(file_path.name, manifest_path)
+    shutil.rmtree(parts_folder, ignore_errors=True)
+    manifest_path.unlink()
+    send_info_event(_download_and_unzip_file, f"Successfully unzipped to '{dataset_folder}'.")
+
+
+def _get_part_path(parts_folder: Path, start: int) -> Path:
+    return parts_folder / f"{start:015d}.part"
+
+
+class _PipelinedUnzip:
+    """Track which zip members can be extracted and which part files can be deleted during a pipelined download."""
+
+    def __init__(self, parts_folder: Path, segments: list[tuple[int, int]], done: set[int], verifier: "_ChecksumVerifier") -> None:
+        self._parts_folder = parts_folder
+        self._segments = segments
+        self._done = done
+        self._verifier = verifier
+        self._members: list[tuple[zipfile.ZipInfo, int, int]] | None = None  # (member, first segment, last segment)
+        self._start_dir: int | None = None
+        self._num_unextracted = [0] * len(segments)  # per segment
+        self._num_hashed = 0  # number of segments in verified prefix
+        self._deleted: set[int] = set()
+
+    def open_archive(self) -> BinaryIO:
+        return io.BufferedReader(_SegmentedArchive(self._parts_folder, self._segments, self._done), _CHUNK_SIZE)
+
+    def update(self, extractor: "_ZipExtractor") -> dict[Future, tuple[zipfile.ZipInfo, int, int]]:
+        """Hash finished prefix, submit members that are fully downloaded and delete part files that are no longer needed."""
+        while self._num_hashed < len(self._segments) and self._segments[self._num_hashed][0] in self._done:
+            self._num_hashed += 1
+        if self._num_hashed and self._verifier.get_position() < self._segments[self._num_hashed - 1][1]:
+            with self.open_archive() as f:
+                self._verifier.update_from_stream(f, self._segments[self._num_hashed - 1][1])
+
+        if self._members is None and not self._read_central_directory():
+            return {}
+
+        futures = dict()
+        remaining = []
+        for member, first, last in self._members:
+            if any(self._segments[i][0] not in self._done for i in range(first, last + 1)):
+                remaining.append((member, first, last))
+                continue
+            future = extractor.submit(member)
+            if future is None:
+                self.set_extracted((member, first, last))
+            else:
+                futures[future] = (member, first, last)
+        self._members = remaining
+
+        self._delete_unused_parts()
+        return futures
+
+    def set_extracted(self, entry: tuple[zipfile.ZipInfo, int, int]) -> None:
+        __, first, last = entry
+        for i in range(first, last + 1):
+            self._num_unextracted[i] -= 1
+
+    def verify(self, name: str, manifest_path: Path) -> None:
+        if self._members is None or self._members:
+            message = f"Pipelined unzip of {name} finished without extracting all members."
+            raise RuntimeError(message)
+        with self.open_archive() as f:
+            self._verifier.update_from_stream(f, self._segments[-1][1] if self._segments else 0)
+        self._verifier.verify(name, manifest_path)
+
+    def _read_central_directory(self) -> bool:
+        """Read member list from zip central directory. Return False if the needed segments are not downloaded yet."""
+        try:
+            with self.open_archive() as file, zipfile.ZipFile(file, "r") as zf:
+                members = sorted(zf.infolist(), key=lambda m: m.header_offset)
+                start_dir = getattr(zf, "start_dir", self._segments[-1][1])
+        except _SegmentNotAvailableError:
+            return False
+
+        # a member occupies the bytes from its local header up to the next local header (or the central directory)
+        segment_size = self._segments[0][1]
+        self._members = []
+        for i, member in enumerate(members):
+            end = members[i + 1].header_offset if i + 1 < len(members) else start_dir
+            first, last = member.header_offset // segment_size, max(end - 1, member.header_offset) // segment_size
+            self._members.append((member, first, last))
+            for j in range(first, last + 1):
+                self._num_unextracted[j] += 1
+        self._start_dir = start_dir
+        return True
+
+    def _delete_unused_parts(self) -> None:
+        for i in range(self._num_hashed if self._verifier.is_enabled() else len(self._segments)):
+            start, end = self._segments[i]
+            if start in self._deleted or start not in self._done or self._num_unextracted[i] > 0 or end > self._start_dir:
+                continue
+            try:
+                _get_part_path(self._parts_folder, start).unlink(missing_ok=True)
+            except OSError:
+                continue  # may still be open by a worker on some platforms, try again later
+            self._deleted.add(start)
+
+
+class _SegmentNotAvailableError(Exception):
+    """Raised when reading bytes from a segment that is not downloaded yet."""
+
+
+class _SegmentedArchive(io.RawIOBase):
+    """Read only file object over an archive stored as one part file per downloaded segment."""
+
+    def __init__(self, parts_folder: Path, segments: list[tuple[int, int]], done: set[int]) -> None:
+        self._parts_folder = parts_folder
+        self._segments = segments
+        self._starts = [start for start, __ in segments]
+        self._total = segments[-1][1] if segments else 0
+        self._done = done
+        self._position = 0
+        self._handle: BinaryIO | None = None
+        self._handle_start: int | None = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._total
+        if offset < 0:
+            message = f"Negative seek position {offset}"
+            raise OSError(message)
+        self._position = offset
+        return self._position
+
+    def readinto(self, buffer: memoryview) -> int:
+        if self._position >= self._total:
+            return 0
+        start, end = self._segments[bisect.bisect_right(self._starts, self._position) - 1]
+        if start not in self._done:
+            message = f"Segment starting at byte {start} is not downloaded yet"
+            raise _SegmentNotAvailableError(message)
+        if self._handle_start != start:
+            self._close_handle()
+            self._handle = _get_part_path(self._parts_folder, start).open("rb")
+            self._handle_start = start
+        self._handle.seek(self._position - start)
+        num_bytes = self._handle.readinto(memoryview(buffer)[: end - self._position])
+        self._position += num_bytes
+        if self._position >= end:
+            self._close_handle()  # so that the part file can be deleted
+        return num_bytes
+
+    def close(self) -> None:
+        self._close_handle()
+        super().close()
+
+    def _close_handle(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+        self._handle = None
+        self._handle_start = None
+
+
+class _DownloadProgress:
+    """Thread safe progress output for a download."""
+
+    def __init__(self, name: str, total: int, downloaded: int) -> None:
+        self._name = name
+        self._total = total
+        self._downloaded = downloaded
+        self._lock = threading.Lock()
+        self._last_write = 0.0
+
+    def add(self, num_bytes: int) -> None:
+        with self._lock:
+            self._downloaded += num_bytes
+            now = time.monotonic()
+            if now - self._last_write >= 0.2:
+                self._last_write = now
+                self._write()
+
+    def finish(self) -> None:
+        with self._lock:
+            self._write()
             sys.stdout.write("\n")
             sys.stdout.flush()
-        except requests.exceptions.RequestException as e:
-            message = f"An exception occured during processing of dataset: {e}"
-            send_error_event(sender=demo_1_download_dataset, message=message, exception_type_name=str(type(e)), traceback=e.__traceback__)
-            raise RuntimeError(message) from e
 
-    send_info_event(demo_1_download_dataset, "Dataset download finished.")
-    _unzip_files_in_folder(local_dataset_folder)
+    def _write(self) -> None:
+        mb_downloaded = self._downloaded / (1024 * 1024)
+        if self._total:
+            percent = self._downloaded * 100 // self._total
+            mb_total = self._total / (1024 * 1024)
+            msg = f"\r\033[KDownloading {self._name}: {percent:3d}% ({mb_downloaded:.1f}/{mb_total:.1f} MB)"
+        else:
+            msg = f"\r\033[KDownloading {self._name}: {mb_downloaded:.1f} MB"
+        sys.stdout.write(msg)
+        sys.stdout.flush()
+
+
+class _ChecksumVerifier:
+    """Incrementally hash a download and compare with checksum from Zenodo on the form 'md5:<hexdigest>'."""
+
+    def __init__(self, checksum: str | None) -> None:
+        self._expected = None
+        self._hash = None
+        self._position = 0
+        if checksum:
+            algorithm, _, digest = checksum.partition(":")
+            if digest and algorithm in hashlib.algorithms_available:
+                self._expected = digest.lower()
+                self._hash = hashlib.new(algorithm)
+
+    def update(self, data: bytes) -> None:
+        if self._hash is not None:
+            self._hash.update(data)
+            self._position += len(data)
+
+    def update_from_stream(self, file: BinaryIO, end: int) -> None:
+        """Hash file from the already hashed position up to end."""
+        if self._hash is None or end <= self._position:
+            return
+        file.seek(self._position)
+        while self._position < end:
+            data = file.read(min(_CHUNK_SIZE, end - self._position))
+            if not data:
+                break
+            self.update(data)
+
+    def get_position(self) -> int:
+        return self._position
+
+    def is_enabled(self) -> bool:
+        return self._hash is not None
+
+    def verify(self, name: str, *paths_to_delete_on_error: Path) -> None:
+        if self._hash is None:
+            send_warning_event(_ChecksumVerifier, "No checksum available for download. Skipping verification.")
+            return
+        actual = self._hash.hexdigest()
+        if actual == self._expected:
+            return
+        for path in paths_to_delete_on_error:
+            path.unlink(missing_ok=True)
+        message = f"Checksum mismatch for downloaded file {name}. Expected {self._expected}, got {actual}."
+        send_error_event(sender=_ChecksumVerifier, message=message, exception_type_name="DownloadError", traceback="")
+        raise RuntimeError(message)
 
 
 def _unzip_files_in_folder(dataset_folder: Path) -> None:
-    files_to_unzip = [fp for fp in dataset_folder.iterdir() if zipfile.is_zipfile(str(fp))]
+    files_to_unzip = [fp for fp in dataset_folder.iterdir() if not _is_download_in_progress(fp) and zipfile.is_zipfile(str(fp))]
     if files_to_unzip:
         send_info_event(_unzip_files_in_folder, f"Found zip files: {files_to_unzip}. Begin unzipping.")
         # Unzipping
         for file_path in files_to_unzip:
-            with zipfile.ZipFile(file_path, "r") as zf:
-                for member in zf.namelist():
-                    member_path = Path(member)
-
-                    # Split the path and remove the first component (top-level folder)
-                    parts = member_path.parts
-
-                    if len(parts) > 1:
-                        folder_path = dataset_folder
-                        for part in parts[:-1]:
-                            folder_path = folder_path / part
-                        folder_path.mkdir(exist_ok=True, parents=True)
-                        new_path = folder_path / parts[-1]
-
-                    else:
-                        new_path = dataset_folder / member_path
-
-                    if new_path.exists():
-                        continue
-
-                    # Create parent directories if they don't exist
-                    if member.endswith("/"):
-                        new_path.mkdir(exist_ok=True, parents=True)
-                    elif not member.endswith("/"):
-                        with new_path.open(mode="wb") as outfile:
-                            outfile.write(zf.read(member))
+            t = time.time()
+            with _ZipExtractor(partial(file_path.open, "rb"), dataset_folder) as extractor:
+                extractor.extract_all()
+            seconds = time.time() - t
+            mb = extractor.get_num_bytes_written() / (1024 * 1024)
+            send_info_event(_unzip_files_in_folder, f"Unzipped {file_path.name}: {mb:.1f} MB in {seconds:.1f} seconds ({mb / max(seconds, 1e-6):.1f} MB/s)")
         send_info_event(_unzip_files_in_folder, f"Successfully unzipped to '{dataset_folder}'.")
         _delete_zip_files(files_to_unzip)
     else:
         send_info_event(_unzip_files_in_folder, f"Found no valid files to unzip in '{dataset_folder}'")
 
 
+class _ZipExtractor:
+    """
+    Extract members of a zip file over a thread pool.
+
+    Each worker thread opens its own ZipFile handle, and members are streamed to disk through a fixed size buffer,
+    so memory use does not depend on member size. Members are written to a temporary file that is renamed when complete,
+    so a member that exists on disk is always complete and can be skipped.
+    """
+
+    _BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, open_archive: Callable[[], BinaryIO], dataset_folder: Path) -> None:
+        self._open_archive = open_archive
+        self._dataset_folder = dataset_folder
+        self._local = threading.local()
+        self._handles: list[tuple[zipfile.ZipFile, BinaryIO]] = []
+        self._lock = threading.Lock()
+        self._num_bytes_written = 0
+        self._pool = ThreadPoolExecutor(max_workers=max(du.UNZIP_NUM_THREADS, 1))
+
+    def __enter__(self) -> "_ZipExtractor":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        for zf, file in self._handles:
+            zf.close()
+            file.close()
+        self._handles.clear()
+
+    def get_num_bytes_written(self) -> int:
+        return self._num_bytes_written
+
+    def extract_all(self) -> None:
+        with self._open_archive() as file, zipfile.ZipFile(file, "r") as zf:
+            members = zf.infolist()
+        futures = [self.submit(member) for member in members]
+        for future in as_completed([f for f in futures if f is not None]):
+            future.result()
+
+    def submit(self, member: zipfile.ZipInfo) -> Future | None:
+        """Create directories for member right away and extract file content in a worker thread."""
+        new_path = self._dataset_folder / member.filename
+        if member.is_dir():
+            new_path.mkdir(exist_ok=True, parents=True)
+            return None
+        new_path.parent.mkdir(exist_ok=True, parents=True)
+        return self._pool.submit(self._extract_member, member, new_path)
+
+    def _extract_member(self, member: zipfile.ZipInfo, new_path: Path) -> None:
+        if new_path.exists():
+            return
+        zf = getattr(self._local, "zf", None)
+        if zf is None:
+            file = self._open_archive()
+            zf = zipfile.ZipFile(file, "r")
+            self._local.zf = zf
+            with self._lock:
+                self._handles.append((zf, file))
+        tmp_path = new_path.with_name(new_path.name + ".part")
+        with zf.open(member) as source, tmp_path.open(mode="wb") as outfile:
+            shutil.copyfileobj(source, outfile, self._BUFFER_SIZE)
+        tmp_path.replace(new_path)
+        with self._lock:
+            self._num_bytes_written += member.file_size
+
+
 def _delete_zip_files(zip_files: list[Path]) -> None:
     for fp in zip_files:
         try:
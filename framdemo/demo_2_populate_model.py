@@ -1,4 +1,8 @@
-def demo_2_populate_model() -> None:
+from framdemo.tracing import span
+
+
+@span()
+def demo_2_populate_model(num_cpu_cores: int = 1, force: bool = False) -> None:
     """
     Populate model.
 
@@ -7,17 +11,55 @@ def demo_2_populate_model() -> None:
     3. Restrict release capacity of hydropower plants with a profile.
     4. Save model to disk for use in upcoming demos.
     5. Display model content before and after population.
+
+    With num_cpu_cores > 1, the database folders are read and validated in parallel processes.
+
+    A fingerprint of the database, the code of this demo and the fram-core and fram-data versions is saved next to the
+    populated model. If they are unchanged since the last run, the saved model is reused and steps 1-5 are skipped (unless force is True).
     """
+    import hashlib
+    import inspect
+    import json
     from datetime import timedelta
+    from importlib.metadata import version
+    from pathlib import Path
 
     import numpy as np
     from framcore import Model
     from framcore.components import HydroModule
+    from framcore.events import send_info_event
     from framcore.timeindexes import OneYearProfileTimeIndex
     from framcore.timevectors import ListTimeVector
     from framdata import NVEEnergyModelPopulator
 
     import framdemo.demo_utils as du
+    from framdemo.parallel_populator import ParallelNVEEnergyModelPopulator
+
+    model_path = du.DEMO_FOLDER / "populated_model.pickle"
+    fingerprint_path = du.DEMO_FOLDER / "populated_model.fingerprint.json"
+    validate = True
+
+    # skip populate if database, code and settings are unchanged since the saved model was populated
+    # (code covers this file, e.g. the release capacity profile below, and the parallel populator)
+    code_files = [Path(__file__), Path(inspect.getsourcefile(ParallelNVEEnergyModelPopulator))]
+    fingerprint = {
+        "fram-core": version("fram-core"),
+        "fram-data": version("fram-data"),
+        "code": {path.name: hashlib.sha1(path.read_bytes()).hexdigest() for path in code_files},
+        "validate": validate,
+        "database": du.get_folder_fingerprint(du.DEMO_FOLDER / "database"),
+    }
+    previous_fingerprint = None
+    if fingerprint_path.is_file():
+        with fingerprint_path.open("r") as f:
+            previous_fingerprint = json.load(f)
+    if not force and du.exists(model_path) and previous_fingerprint == fingerprint:
+        send_info_event(demo_2_populate_model, f"Database is unchanged. Reusing populated model {model_path}")
+        return
+    if previous_fingerprint is not None:
+        previous_database = previous_fingerprint.get("database", dict())
+        changed = sorted(k for k in fingerprint["database"].keys() | previous_database.keys() if fingerprint["database"].get(k) != previous_database.get(k))
+        send_info_event(demo_2_populate_model, f"Populating model because of changes in: {changed or 'package versions, code or settings'}")
 
     # create empty model
     model = Model()
@@ -27,7 +69,10 @@ def demo_2_populate_model() -> None:
 
     # create populator connected to data source and
     # use it to populate the model with data objects
-    populator = NVEEnergyModelPopulator(source=du.DEMO_FOLDER / "database", validate=True)
+    if num_cpu_cores > 1:
+        populator = ParallelNVEEnergyModelPopulator(source=du.DEMO_FOLDER / "database", validate=validate, num_processes=num_cpu_cores)
+    else:
+        populator = NVEEnergyModelPopulator(source=du.DEMO_FOLDER / "database", validate=validate)
     populator.populate(model)
 
     # Restrict the release capacity of the hydropower plants with a profile.
@@ -42,7 +87,9 @@ def demo_2_populate_model() -> None:
     after = model.get_content_counts()
 
     # save populated model to disk so we can use it later
-    du.save(model, path=du.DEMO_FOLDER / "populated_model.pickle")
+    du.save(model, path=model_path)
+    with fingerprint_path.open("w") as f:
+        json.dump(fingerprint, f, indent=2)
 
     # display how model was changed
     du.display("Model content before populate:", before)
@@ -1,3 +1,7 @@
+from framdemo.tracing import span
+
+
+@span()
 def demo_3_solve_model(num_cpu_cores: int) -> None:
     """
     Solve model.
@@ -8,6 +12,7 @@ def demo_3_solve_model(num_cpu_cores: int) -> None:
     4. Create a JulES solver object.
     5. Configure JulES.
     6. Solve the model with JulES.
+    7. Write model stores of the saved model and solver (see MODEL_FORMAT in demo_utils).
     """
     from framcore import Model
     from framcore.aggregators import HydroAggregator, NodeAggregator
@@ -134,6 +139,10 @@ def demo_3_solve_model(num_cpu_cores: int) -> None:
     # Solve the model with JulES
     jules.solve(model)
 
+    # Write model stores of the model and solver saved in the solve folder, so that later demos load them fast
+    for file_name in ["model.pickle", "solver.pickle"]:
+        du.convert_to_store(du.DEMO_FOLDER / "base" / file_name)
+
 
 if __name__ == "__main__":
     demo_3_solve_model(num_cpu_cores=8)
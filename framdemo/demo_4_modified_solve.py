@@ -1,3 +1,7 @@
+from framdemo.tracing import span
+
+
+@span()
 def demo_4_modified_solve(num_cpu_cores: int) -> None:
     """
     Use same model as demo 3 except one change. Reuse solver settings.
@@ -7,6 +11,7 @@ def demo_4_modified_solve(num_cpu_cores: int) -> None:
     3. Make a few configurations
     4. Increase demand in Norway with 20 percent
     5. Solve the modified model with JulES
+    6. Write model stores of the saved model and solver (see MODEL_FORMAT in demo_utils)
     """
     from framcore import Model
     from framcore.components import Demand
@@ -35,6 +40,10 @@ def demo_4_modified_solve(num_cpu_cores: int) -> None:
     # Solve the model with JulES
     jules.solve(model)
 
+    # Write model stores of the model and solver saved in the solve folder, so that later demos load them fast
+    for file_name in ["model.pickle", "solver.pickle"]:
+        du.convert_to_store(du.DEMO_FOLDER / "modified" / file_name)
+
 
 if __name__ == "__main__":
     demo_4_modified_solve(num_cpu_cores=8)
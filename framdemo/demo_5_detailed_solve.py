@@ -1,3 +1,7 @@
+from framdemo.tracing import span
+
+
+@span()
 def demo_5_detailed_solve(num_cpu_cores: int) -> None:
     """
     Use same model as demo 3 except with detailed hydro power instead of aggregated hydropower.
@@ -8,6 +12,7 @@ def demo_5_detailed_solve(num_cpu_cores: int) -> None:
     4. Make a few configurations (where to save files and to reuse installation)
     5. Create hydro power aggregators and put them into JulES via config
     6. Solve the model with JulES.
+    7. Write model stores of the saved model and solver (see MODEL_FORMAT in demo_utils).
     """
     from framcore import Model
     from framcore.aggregators import HydroAggregator, NodeAggregator
@@ -73,6 +78,10 @@ def demo_5_detailed_solve(num_cpu_cores: int) -> None:
     # Solve the model with JulES
     jules.solve(model)
 
+    # Write model stores of the model and solver saved in the solve folder, so that later demos load them fast
+    for file_name in ["model.pickle", "solver.pickle"]:
+        du.convert_to_store(du.DEMO_FOLDER / "detailed" / file_name)
+
 
 if __name__ == "__main__":
     demo_5_detailed_solve(num_cpu_cores=8)
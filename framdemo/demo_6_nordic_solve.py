@@ -1,3 +1,7 @@
+from framdemo.tracing import span
+
+
+@span()
 def demo_6_nordic_solve(num_cpu_cores: int) -> None:
     """
     Use same as demo 4, but here we only simulate nordic zones, using prices from demo 3 as exogenous prices.
@@ -8,6 +12,7 @@ def demo_6_nordic_solve(num_cpu_cores: int) -> None:
     4. Make a few configurations
     5. Increase demand in Norway with 20 percent
     6. Solve the modified model with JulES
+    7. Write model stores of the saved model and solver (see MODEL_FORMAT in demo_utils)
     """
     from framcore import Model
     from framcore.components import Demand
@@ -43,6 +48,10 @@ def demo_6_nordic_solve(num_cpu_cores: int) -> None:
     # Solve the model with JulES
     jules.solve(model)
 
+    # Write model stores of the model and solver saved in the solve folder, so that later demos load them fast
+    for file_name in ["model.pickle", "solver.pickle"]:
+        du.convert_to_store(du.DEMO_FOLDER / "modified_nordic" / file_name)
+
 
 if __name__ == "__main__":
     demo_6_nordic_solve(num_cpu_cores=8)
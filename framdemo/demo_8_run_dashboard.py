@@ -1,16 +1,31 @@
-def demo_8_run_dashboard() -> None:
+from framdemo.tracing import span
+
+
+@span()
+def demo_8_run_dashboard(server: bool = False) -> None:
     """
     Run dashboard with results in your browser.
 
     1. Finds an available port on localhost.
     2. Makes sure a supported browser is available (chrome, msedge or firefox).
-    2. Runs streamlit dashboard by data and plots in dashboard_app.py.
+    3. Runs streamlit dashboard by data and plots in dashboard_app.py.
+
+    With server=True, the dashboard is instead run as a long-lived server for many users, on DASHBOARD_SERVER_PORT and
+    DASHBOARD_SERVER_ADDRESS (set in demo_utils), and no browser is opened. The function returns when the server is stopped.
+    The default address only serves this machine. The dashboard has no authentication, so serving other machines
+    (e.g. address 0.0.0.0) is an explicit choice.
+    All browser sessions are served by the same process and share one cache of open result files and series read from them.
+    Open sessions reload results when demo 7 writes the result files again.
     """
     import subprocess
     import webbrowser
     from os import environ
     from pathlib import Path
 
+    from framcore.events import send_info_event, send_warning_event
+
+    import framdemo.demo_utils as du
+
     def get_available_port() -> int:
         """
         Find an available local port by binding to port 0.
@@ -60,21 +75,38 @@ def demo_8_run_dashboard() -> None:
     current_folder = Path.resolve(Path(__file__)).parent
     app_path = current_folder / "dashboard_app.py"
 
-    port = get_available_port()
-
-    # Open the Streamlit app in browser
-    webbrowser.register("streamlit_browser", None, webbrowser.BackgroundBrowser(get_browser_exe_path()))
-
     # Used to avoid email prompt on first run
     environ["STREAMLIT_SERVER_HEADLESS"] = "true"
     environ["STREAMLIT_BROWSER_GATHER_USAGE_STATS"] = "false"
 
-    # Run the Streamlit app
     streamlit_cmd_path = get_streamlit_cmd_path()
     streamlit_cmd = "streamlit" if streamlit_cmd_path is None else str(streamlit_cmd_path)
+
+    if server:
+        # Result files are watched by the app itself (DASHBOARD_RELOAD_SECONDS), so the source file watcher is not needed
+        port = du.DASHBOARD_SERVER_PORT
+        address = du.DASHBOARD_SERVER_ADDRESS
+        if address not in ("127.0.0.1", "localhost", "::1"):
+            send_warning_event(demo_8_run_dashboard, f"Dashboard server listens on {address}, so other machines can reach it without authentication.")
+        send_info_event(demo_8_run_dashboard, f"Dashboard server running on http://{address}:{port}. Stop it with Ctrl+C.")
+        subprocess.run(
+            [streamlit_cmd, "run", str(app_path), "--server.port", str(port), "--server.address", address, "--server.fileWatcherType", "none"],
+            env=environ,
+            check=False,
+        )
+        return
+
+    port = get_available_port()
+
+    # Open the Streamlit app in browser
+    webbrowser.register("streamlit_browser", None, webbrowser.BackgroundBrowser(get_browser_exe_path()))
+
+    # Run the Streamlit app
     subprocess.Popen([streamlit_cmd, "run", str(app_path), "--server.port", str(port)], env=environ)
     webbrowser.open(f"http://localhost:{port}")
 
 
 if __name__ == "__main__":
-    demo_8_run_dashboard()
+    import sys
+
+    demo_8_run_dashboard(server="--server" in sys.argv[1:])
@@ -7,27 +7,36 @@ import pandas as pd
 from framdata.database_names import TimeVectorMetadataNames as TvMn
 from framdata.file_editors import NVEH5TimeVectorEditor
 
-save_path = r"./example.h5"
+from framdemo.tracing import span
 
-# Create h5 editor with dataframe and metadata.
-h5_editor = NVEH5TimeVectorEditor()
 
-frequency = timedelta(hours=1)
+@span("demo_9_edit_h5_profiles")
+def main() -> None:
+    """Create an H5 file with a time vector, replace its negative values with zero and load the file again."""
+    save_path = r"./example.h5"
 
-# Add content to metadata and table.
-h5_editor.set_common_index(pd.date_range(start="29/08/2025", periods=7, freq=frequency).to_numpy())
-h5_editor.set_vector("v1", np.array([0, 1, 2, 3, 0, -1, -2]))
-h5_editor.set_common_metadata({TvMn.START: h5_editor.get_common_index()[0], TvMn.FREQUENCY: frequency, TvMn.NUM_POINTS: 7})
+    # Create h5 editor with dataframe and metadata.
+    h5_editor = NVEH5TimeVectorEditor()
 
-# Replace negative values with zero:
-for vector_id in h5_editor.get_vector_ids():
-    vector = h5_editor.get_vector(vector_id)
-    vector[vector < 0] = 0
-    h5_editor.set_vector(vector_id, vector)
+    frequency = timedelta(hours=1)
 
-# Save the table and metadata.
-h5_editor.save_to_h5(save_path)
+    # Add content to metadata and table.
+    h5_editor.set_common_index(pd.date_range(start="29/08/2025", periods=7, freq=frequency).to_numpy())
+    h5_editor.set_vector("v1", np.array([0, 1, 2, 3, 0, -1, -2]))
+    h5_editor.set_common_metadata({TvMn.START: h5_editor.get_common_index()[0], TvMn.FREQUENCY: frequency, TvMn.NUM_POINTS: 7})
 
+    # Replace negative values with zero:
+    for vector_id in h5_editor.get_vector_ids():
+        vector = h5_editor.get_vector(vector_id)
+        vector[vector < 0] = 0
+        h5_editor.set_vector(vector_id, vector)
 
-# To load an existing h5 file, supply a path to the editor.
-h5_editor = NVEH5TimeVectorEditor(save_path)
+    # Save the table and metadata.
+    h5_editor.save_to_h5(save_path)
+
+    # To load an existing h5 file, supply a path to the editor.
+    h5_editor = NVEH5TimeVectorEditor(save_path)
+
+
+if __name__ == "__main__":
+    main()
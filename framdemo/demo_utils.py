@@ -4,37 +4,179 @@ Contains paths that may be set by users to override default behaviour.
 Contains constants and small utility functions to make the demos more robust and easier to follow.
 """
 
-import pickle
+import hashlib
 from pathlib import Path
 
 from framcore.events import send_event, set_event_handler
 
+from framdemo.event_log import EventLogHandler
 from framdemo.EventHandler import EventHandler
+from framdemo.model_store import get_store_mtime, is_store, load_store, save_store
+from framdemo.pickle_files import dump_pickle, load_pickle
+
+# events from framcore and the demos below this level ("debug", "info", "warning" or "error") are not shown
+EVENT_LEVEL = "debug"
+# show the method that sent an event after the name of the sender (e.g. framcore.Model.populate), at a small cost per event
+EVENT_CALLER_NAMES = True
+
+# write events as JSON Lines to this file (e.g. for headless runs) from a background thread, instead of printing them while
+# the demo waits. The file is rotated when larger than EVENT_LOG_MAX_BYTES, keeping EVENT_LOG_BACKUP_COUNT old files
+EVENT_LOG_FILE = None
+EVENT_LOG_MAX_BYTES = 100 * 1024**2
+EVENT_LOG_BACKUP_COUNT = 5
+# with EVENT_LOG_FILE, also print events to the console (from the background thread)
+EVENT_LOG_CONSOLE = True
+# with EVENT_LOG_FILE, events waiting to be written. When full, debug and info events are dropped (and counted in the log)
+EVENT_LOG_QUEUE_SIZE = 10000
 
 # this makes demo output better
-set_event_handler(EventHandler())
+if EVENT_LOG_FILE is None:
+    set_event_handler(EventHandler(EVENT_LEVEL, EVENT_CALLER_NAMES))
+else:
+    set_event_handler(
+        EventLogHandler(
+            EVENT_LOG_FILE,
+            EVENT_LEVEL,
+            EVENT_CALLER_NAMES,
+            console=EVENT_LOG_CONSOLE,
+            max_bytes=EVENT_LOG_MAX_BYTES,
+            backup_count=EVENT_LOG_BACKUP_COUNT,
+            queue_size=EVENT_LOG_QUEUE_SIZE,
+        ),
+    )
 
 DATASET_SOURCE = None
+
+# folder with a cache of extracted datasets shared by many demo folders (None disables the cache)
+DATASET_CACHE = None
+# least recently used datasets are evicted when the cache is larger than this, except datasets symlinked into a demo folder
+DATASET_CACHE_MAX_BYTES = 20 * 1024**3
+# how dataset files from DATASET_SOURCE or DATASET_CACHE are placed in the demo folder ("reflink", "hardlink", "symlink" or "copy")
+# with "hardlink" and "symlink", files are shared and must not be edited in place
+DATASET_LINK_MODE = "reflink"
 DEMO_FOLDER = Path.resolve(Path(__file__)).parent.parent / "demo_folder"
+# timed spans of the demos (framdemo.tracing) are written to this folder by all processes (None disables). run_all writes
+# them to trace.json in the demo folder (open in https://ui.perfetto.dev) and shows time per span at the end
+TRACE_FOLDER = DEMO_FOLDER / "trace"
+# run_all saves a fingerprint of each stage (code, inputs and outputs) in this folder, and skips stages that are unchanged
+# since the last run (None runs all stages every time, as does python run_all.py --force)
+STAGE_FINGERPRINT_FOLDER = DEMO_FOLDER / "stage_fingerprints"
 
 JULIA_PATH_EXE = None
 JULIA_PATH_ENV = DEMO_FOLDER / "julia_env"
 JULIA_PATH_DEPOT = DEMO_FOLDER / "julia_depot"
 
+# dataset download is split into byte range segments fetched over this many parallel connections
+DOWNLOAD_NUM_CONNECTIONS = 4
+DOWNLOAD_SEGMENT_SIZE = 64 * 1024 * 1024
+
+# zip file members are extracted over this many threads
+UNZIP_NUM_THREADS = 4
+
+# extract zip file members while the dataset is downloading, and delete downloaded segments as soon as they are extracted
+DOWNLOAD_PIPELINED_UNZIP = False
+
+# format used by save: "store" (arrays in a memory-mapped binary file next to a compact index, fast to load) or "pickle"
+MODEL_FORMAT = "store"
+# with MODEL_FORMAT "store", the solve demos also write a store next to the model.pickle and solver.pickle files that JulES writes
+# to the solve folder, so later loads of them are fast. This uses extra disk space about the size of the pickle files
+MODEL_STORE_CONVERT_PICKLES = True
+# with MODEL_FORMAT "pickle", arrays are written to a sidecar file next to the pickle file. Compress both files with
+# "zstd" or "lz4" (needs the zstandard or lz4 package), or None to keep the sidecar file memory-mappable on load
+PICKLE_COMPRESSION = None
+
+# format of result files written by demo_7_get_data for the dashboard: "hdf5" (one .h5 file per result set), "parquet" or "arrow"
+# (a folder with one file per solve, needs the pyarrow package). The dashboard reads the most recently written format
+RESULT_STORE_FORMAT = "hdf5"
+# memory used by the dashboard to keep result series between reruns (least recently used series are removed first)
+DASHBOARD_CACHE_MAX_BYTES = 512 * 1024**2
+# long series are downsampled (min and max of buckets of periods) to at most this many points per line in dashboard plots
+DASHBOARD_MAX_POINTS = 2000
+# open dashboard sessions check this often (seconds) if result files were written again, and reload them (None disables)
+DASHBOARD_RELOAD_SECONDS = 5
+# port and address of the dashboard when run as a server for many users (demo_8_run_dashboard with server=True).
+# The dashboard has no authentication, so it only listens on this machine by default. Set the address to "0.0.0.0"
+# to serve other machines, only on a trusted network or behind a proxy that handles authentication
+DASHBOARD_SERVER_PORT = 8501
+DASHBOARD_SERVER_ADDRESS = "127.0.0.1"
+
+
 def display(message: str, obj: object = None, digits_round: int = 1) -> None:
     """Send an object to EventHandler for display."""
     send_event(None, "display", message=message, object=obj, digits_round=digits_round)
 
 
+def get_store_path(path: Path) -> Path:
+    """Return path of model store used for object saved at path (e.g. model.store for model.pickle)."""
+    return path.with_suffix(".store")
+
+
+def exists(path: Path) -> bool:
+    """Return True if an object is saved at path, as pickle file or model store."""
+    return path.exists() or is_store(get_store_path(path))
+
+
+def has_current_store(path: Path) -> bool:
+    """Return True if object saved at path has a model store that is at least as new as the pickle file."""
+    store_path = get_store_path(path)
+    return is_store(store_path) and (not path.exists() or get_store_mtime(store_path) >= path.stat().st_mtime)
+
+
+def get_mtime(path: Path) -> float:
+    """Return time object saved at path was last written, as pickle file or model store."""
+    mtimes = [path.stat().st_mtime] if path.exists() else []
+    if is_store(get_store_path(path)):
+        mtimes.append(get_store_mtime(get_store_path(path)))
+    return max(mtimes)
+
+
 def load(path: Path) -> object:
-    """Read object from pickle file."""
-    with Path.open(path, "rb") as f:
-        return pickle.load(f)
+    """Read object saved at path. Read from model store if there is one that is newer than the pickle file. Never writes files."""
+    if has_current_store(path):
+        return load_store(get_store_path(path))
+    return load_pickle(path)
+
+
+def convert_to_store(path: Path) -> None:
+    """
+    Write a model store next to pickle file at path (e.g. solver.pickle written by JulES), so later loads are fast.
+
+    Only with MODEL_FORMAT "store" and MODEL_STORE_CONVERT_PICKLES, and if there is no current store. Call this in the
+    demo that writes the pickle file, before demos that read it start.
+    """
+    if MODEL_FORMAT == "store" and MODEL_STORE_CONVERT_PICKLES and path.exists() and not has_current_store(path):
+        save_store(load_pickle(path), get_store_path(path))
 
 
 def save(obj: object, path: Path) -> None:
-    """Write object to pickle file at given path."""
+    """Write object to given path, as model store or pickle file depending on MODEL_FORMAT."""
     if not path.parent.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
-    with Path.open(path, "wb") as f:
-        pickle.dump(obj, f)
+    if MODEL_FORMAT == "store":
+        save_store(obj, get_store_path(path))
+        return
+    dump_pickle(obj, path, compression=PICKLE_COMPRESSION)
+
+
+def get_folder_fingerprint(folder: Path, hash_content: bool = False) -> dict[str, str]:
+    """
+    Return a fingerprint for each top level item in folder (e.g. for each db_xx directory in the database folder).
+
+    The fingerprint of an item is based on relative path, size and modification time of all files in it,
+    or on relative path and content of all files if hash_content is True.
+    """
+    fingerprints = dict()
+    for item in sorted(folder.iterdir()):
+        sha1 = hashlib.sha1()
+        files = sorted(p for p in item.rglob("*") if p.is_file()) if item.is_dir() else [item]
+        for file in files:
+            sha1.update(file.relative_to(folder).as_posix().encode())
+            if hash_content:
+                with file.open("rb") as f:
+                    while chunk := f.read(1024 * 1024):
+                        sha1.update(chunk)
+            else:
+                stat = file.stat()
+                sha1.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        fingerprints[item.name] = sha1.hexdigest()
+    return fingerprints
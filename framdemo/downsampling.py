@@ -0,0 +1,97 @@
+"""
+Downsampling of long time series (e.g. 3-hour blocks over many weather years) before they are plotted in the dashboard.
+
+Series are downsampled with min/max bucketing: the periods are split into buckets of equal size, and the minimum and
+maximum of each bucket are kept in the order they occur. Peaks and dips stay visible in the plot, unlike when taking
+the mean or every n-th value.
+
+write_pyramid writes min/max tables for bucket sizes 4, 16, 64, ... next to a result table (<metric>_minmax<bucket size>).
+read_downsampled reads a period range of a table with at most max_points points per series, from the finest
+table in the pyramid that is small enough, or from the full table if the range is small or there is no pyramid.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from framdemo.result_store import ResultStore
+
+PYRAMID_FACTOR = 4
+
+_MIN_LEVEL_POINTS = 1000
+
+
+def get_minmax(values: NDArray, bucket_size: int) -> NDArray:
+    """
+    Return min and max of each bucket of bucket_size periods for each row of values, in the order they occur in the bucket.
+
+    The result has two columns per bucket. The last bucket is padded with the last value if it is not full.
+    """
+    num_rows, num_periods = values.shape
+    num_buckets = -(-num_periods // bucket_size)
+    padded = np.pad(values, ((0, 0), (0, num_buckets * bucket_size - num_periods)), mode="edge")
+    buckets = padded.reshape((num_rows, num_buckets, bucket_size))
+    argmin = buckets.argmin(axis=2)
+    argmax = buckets.argmax(axis=2)
+    low = np.take_along_axis(buckets, argmin[..., None], axis=2)[..., 0]
+    high = np.take_along_axis(buckets, argmax[..., None], axis=2)[..., 0]
+    is_min_first = argmin <= argmax
+    out = np.empty((num_rows, 2 * num_buckets), dtype=values.dtype)
+    out[:, 0::2] = np.where(is_min_first, low, high)
+    out[:, 1::2] = np.where(is_min_first, high, low)
+    return out
+
+
+def get_minmax_positions(bucket_size: int, first_bucket: int, num_buckets: int) -> NDArray:
+    """Return x positions (in periods) of the points of buckets in a min/max table, two per bucket."""
+    starts = np.arange(first_bucket, first_bucket + num_buckets, dtype=np.float64) * bucket_size
+    return np.stack([starts, starts + bucket_size / 2], axis=1).reshape(-1)
+
+
+def get_pyramid_bucket_sizes(num_periods: int) -> list[int]:
+    """Return bucket sizes of the pyramid for series with num_periods, finest first. The coarsest level has at most _MIN_LEVEL_POINTS points."""
+    bucket_sizes = []
+    if num_periods <= _MIN_LEVEL_POINTS:
+        return bucket_sizes
+    bucket_size = PYRAMID_FACTOR
+    while bucket_size < num_periods:
+        bucket_sizes.append(bucket_size)
+        if 2 * -(-num_periods // bucket_size) <= _MIN_LEVEL_POINTS:
+            break
+        bucket_size *= PYRAMID_FACTOR
+    return bucket_sizes
+
+
+def write_pyramid(store: ResultStore, solve_name: str, metric: str, columns: list[str], values: NDArray) -> None:
+    """Write min/max tables of values (columns x periods) for each bucket size in the pyramid of the result table of solve and metric."""
+    for bucket_size in get_pyramid_bucket_sizes(values.shape[1]):
+        store.write_table(solve_name, f"{metric}_minmax{bucket_size}", columns, get_minmax(values, bucket_size))
+
+
+def read_downsampled(store: ResultStore, solve_name: str, metric: str, columns: list[str], start: int, stop: int, max_points: int) -> pd.DataFrame:
+    """
+    Return periods start to stop of columns in table of solve and metric, with at most max_points points per column.
+
+    The index of the returned DataFrame is the position of each point in periods. If the store has no pyramid
+    for the table, the full table is read and downsampled.
+    """
+    num_periods = stop - start
+    if num_periods <= max_points:
+        return store.read_table(solve_name, metric, columns).iloc[start:stop]
+
+    # finest level of the pyramid with few enough points in the range
+    bucket_size = PYRAMID_FACTOR
+    while store.has_table(solve_name, f"{metric}_minmax{bucket_size}"):
+        first_bucket = start // bucket_size
+        num_buckets = -(-stop // bucket_size) - first_bucket
+        if 2 * num_buckets <= max_points:
+            table = store.read_table(solve_name, f"{metric}_minmax{bucket_size}", columns).iloc[2 * first_bucket : 2 * (first_bucket + num_buckets)]
+            return table.set_axis(get_minmax_positions(bucket_size, first_bucket, num_buckets), axis=0)
+        bucket_size *= PYRAMID_FACTOR
+
+    # no pyramid (or no level small enough), so downsample the range of the full table
+    table = store.read_table(solve_name, metric, columns).iloc[start:stop]
+    bucket_size = -(-2 * num_periods // max_points)
+    values = get_minmax(table.to_numpy().T, bucket_size)
+    positions = get_minmax_positions(bucket_size, 0, values.shape[1] // 2) + start
+    return pd.DataFrame(values.T, columns=table.columns, index=positions)
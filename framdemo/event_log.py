@@ -0,0 +1,238 @@
+"""
+Event handler that writes framcore events as JSON Lines from a background thread, for headless runs.
+
+EventLogHandler puts each event on a bounded queue and returns. A background thread writes one JSON object per event
+(time, process id, event type, sender and the event fields) to a log file that is rotated when it gets larger than
+max_bytes (events.jsonl, events.jsonl.1, ...), and optionally prints the event to the console with rich as EventHandler does.
+Long solves and extraction loops never wait for terminal or disk I/O.
+
+When the queue is more than half full, only every _DEBUG_SAMPLE_EVERY-th debug event is kept. When it is full,
+debug and info events are dropped, while warnings, errors and other events wait for room in the queue. The number of
+sampled out and dropped events is written to the log as an event of type "dropped".
+
+After close (also called at exit), or if the background thread has stopped, events are printed as by EventHandler
+instead. If the log file cannot be written (OSError), the events of the batch are printed, and writing is tried again
+with the next batch.
+
+Event fields are converted to JSON on the background thread: NumPy arrays and other objects with tolist become lists,
+tracebacks become lists of lines, and other objects their str. Objects sent in events should therefore not be changed after
+they are sent. demo_utils uses this handler when EVENT_LOG_FILE is set.
+"""
+
+import atexit
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from types import TracebackType
+
+from framdemo.EventHandler import EVENT_LEVELS, EventHandler
+
+_DEBUG_SAMPLE_EVERY = 10
+_MAX_BATCH_SIZE = 1000
+_PUT_POLL_SECONDS = 0.1  # warnings and errors waiting for room in a full queue check this often if the thread has stopped
+_STOP = object()
+
+
+class EventLogHandler(EventHandler):
+    """Handle events from framcore.events.send_event by writing them to a rotating JSON Lines file on a background thread."""
+
+    def __init__(
+        self,
+        path: Path,
+        level: str = "debug",
+        caller_names: bool = True,
+        console: bool = True,
+        max_bytes: int = 100 * 1024**2,
+        backup_count: int = 5,
+        queue_size: int = 10000,
+    ) -> None:
+        """
+        Start background thread writing events of level and above to path (see EventHandler for level and caller_names).
+
+        Processes started by the demos (e.g. workers in demo_7_get_data) write to their own file, with the process id
+        before the suffix of path. If console, events are also printed with rich.
+        """
+        super().__init__(level, caller_names)
+        path = Path(path)
+        if multiprocessing.parent_process() is not None:
+            path = path.with_name(f"{path.stem}.{os.getpid()}{path.suffix}")
+        self._path = path
+        self._console = console
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._sample_threshold = queue_size // 2
+        self._num_debug = 0
+        self._dropped: dict[str, int] = dict()
+        self._dropped_lock = threading.Lock()
+        self._is_closed = False  # set by close, or by the background thread when it stops
+        self._file = None
+        self._thread = threading.Thread(target=self._write_events, name="EventLogHandler", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def handle_event(self, sender: object, event_type: str, **kwargs: dict[str, object]) -> None:
+        """Put event on the queue. Debug and info events are sampled or dropped when the queue is filling up."""
+        if EVENT_LEVELS.get(event_type, self._min_level) < self._min_level:
+            return
+        if event_type == "debug" and self._queue.qsize() > self._sample_threshold:
+            self._num_debug += 1
+            if self._num_debug % _DEBUG_SAMPLE_EVERY != 0:
+                self._count_dropped("sampled_debug")
+                return
+        name = self._get_sender_name(sender, sys._getframe(1))
+        if self._is_closed:
+            self._print_event(name, event_type, kwargs)
+            return
+        event = (time.time(), name, event_type, kwargs)
+        if event_type in ("debug", "info"):
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._count_dropped(event_type)
+            return
+        if not self._put(event):
+            self._print_event(name, event_type, kwargs)
+
+    def close(self) -> None:
+        """Write all events on the queue and stop the background thread. Later events are printed as by EventHandler."""
+        if self._is_closed:
+            return
+        self._is_closed = True
+        self._put(_STOP)
+        self._thread.join()
+        # events put on the queue by other threads while closing
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not _STOP:
+                __, name, event_type, kwargs = event
+                self._print_event(name, event_type, kwargs)
+
+    def _put(self, event: object) -> bool:
+        """Wait for room in the queue and put event on it. Return False if the background thread stopped before there was room."""
+        while self._thread.is_alive():
+            try:
+                self._queue.put(event, timeout=_PUT_POLL_SECONDS)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _count_dropped(self, key: str) -> None:
+        """Count event that was not put on the queue, to be written as a dropped event."""
+        with self._dropped_lock:
+            self._dropped[key] = self._dropped.get(key, 0) + 1
+
+    def _write_events(self) -> None:
+        """Write events from the queue in batches until close is called."""
+        pid = os.getpid()
+        try:
+            is_stopped = False
+            while not is_stopped:
+                batch = [self._queue.get()]
+                while len(batch) < _MAX_BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                lines = []
+                events = []
+                for event in batch:
+                    if event is _STOP:
+                        is_stopped = True
+                        continue
+                    event_time, name, event_type, kwargs = event
+                    lines.append(_to_json_line({"time": event_time, "pid": pid, "event_type": event_type, "sender": name, **kwargs}))
+                    events.append((name, event_type, kwargs))
+                    if self._console:
+                        self._print_event(name, event_type, kwargs)
+
+                with self._dropped_lock:
+                    dropped, self._dropped = self._dropped, dict()
+                if dropped:
+                    lines.append(_to_json_line({"time": time.time(), "pid": pid, "event_type": "dropped", "sender": "", "counts": dropped}))
+
+                if not lines:
+                    continue
+                try:
+                    self._write_lines(lines)
+                except OSError as e:
+                    self._close_file()
+                    print(f"EventLogHandler could not write {len(lines)} events to {self._path}: {e}", file=sys.stderr)
+                    if not self._console:
+                        for name, event_type, kwargs in events:
+                            self._print_event(name, event_type, kwargs)
+        finally:
+            self._is_closed = True
+            self._close_file()
+
+    def _write_lines(self, lines: list[str]) -> None:
+        """Write lines to the log file (opened if needed), and rotate it when it is larger than max_bytes."""
+        if self._file is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self._path.open("a", encoding="utf-8")
+        self._file.write("".join(lines))
+        self._file.flush()
+        if self._file.tell() > self._max_bytes:
+            self._close_file()
+            self._rotate()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            file, self._file = self._file, None
+            with contextlib.suppress(OSError):
+                file.close()
+
+    def _print_event(self, name: str, event_type: str, kwargs: dict[str, object]) -> None:
+        """Print event to the console as EventHandler.handle_event does."""
+        try:
+            self._handle_event_using_rich(name, event_type, **kwargs)
+        except Exception:
+            if name:
+                print(name, event_type, kwargs)
+            else:
+                print(event_type, kwargs)
+
+    def _rotate(self) -> None:
+        """Rename log file to <path>.1, <path>.1 to <path>.2 and so on, removing the oldest above backup_count."""
+        for i in range(self._backup_count - 1, 0, -1):
+            older = self._path.with_name(f"{self._path.name}.{i}")
+            if older.exists():
+                older.replace(self._path.with_name(f"{self._path.name}.{i + 1}"))
+        if self._backup_count > 0:
+            self._path.replace(self._path.with_name(f"{self._path.name}.1"))
+        else:
+            self._path.unlink()
+
+
+def _to_json_line(record: dict[str, object]) -> str:
+    """Return record as one line of JSON. Fields that cannot be written (e.g. dicts with tuple keys) are written as str."""
+    try:
+        return json.dumps(record, default=_to_json, ensure_ascii=False) + "\n"
+    except (TypeError, ValueError):
+        record = {key: value if isinstance(value, (str, int, float, bool)) or value is None else str(value) for key, value in record.items()}
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _to_json(obj: object) -> object:
+    """Convert obj that json cannot write to lists (arrays, tracebacks), dicts with str keys or str."""
+    if isinstance(obj, TracebackType):
+        return traceback.format_tb(obj)
+    if isinstance(obj, BaseException):
+        return traceback.format_exception_only(type(obj), obj)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
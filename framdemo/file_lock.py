@@ -0,0 +1,58 @@
+"""Exclusive lock on a file across processes, used by the dataset cache and versioned folders."""
+
+import sys
+import time
+from pathlib import Path
+
+
+class FileLock:
+    """Non-blocking exclusive lock on a file that is released when the holding process exits."""
+
+    def __init__(self, path: Path) -> None:
+        """Create lock on file at path (created if missing). Use as context manager, and acquire inside it."""
+        self._path = path
+        self._file = None
+        self._is_locked = False
+
+    def __enter__(self) -> "FileLock":
+        self._file = self._path.open("a+b")
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        if self._is_locked:
+            self._unlock()
+        self._file.close()
+
+    def acquire(self, poll_seconds: float) -> None:
+        """Wait until the lock is acquired, trying again every poll_seconds."""
+        while not self.try_acquire():
+            time.sleep(poll_seconds)
+
+    def try_acquire(self) -> bool:
+        """Return True if the lock was acquired, or False if another process (or another FileLock on the same file) holds it."""
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self._is_locked = True
+        return True
+
+    def _unlock(self) -> None:
+        if sys.platform == "win32":
+            import msvcrt
+
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._is_locked = False
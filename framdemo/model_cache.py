@@ -0,0 +1,61 @@
+"""
+Cache of loaded models and solvers, so that each file is only loaded once when it is used many times (e.g. in the sections of demo_7_get_data).
+
+Cached objects are shared and must not be changed. Use get_snapshot to get a model that can be changed,
+e.g. with disaggregate() and aggregators. If the model is saved as a model store, the snapshot is loaded from the
+memory-mapped store, so array data is shared with the cached model until it is written to (copy-on-write).
+Otherwise the snapshot is a deep copy of the cached model.
+"""
+
+import copy
+from pathlib import Path
+
+from framcore import Model
+from framcore.querydbs import CacheDB
+
+import framdemo.demo_utils as du
+
+
+class ModelCache:
+    """Objects loaded with demo_utils.load, and a CacheDB for each model, kept until invalidated."""
+
+    def __init__(self) -> None:
+        """Create empty cache."""
+        self._objects: dict[Path, object] = dict()
+        self._dbs: dict[Path, CacheDB] = dict()
+
+    def load(self, path: Path) -> object:
+        """Return object saved at path. The object is loaded on first call and shared by later calls, so it must not be changed."""
+        if path not in self._objects:
+            self._objects[path] = du.load(path)
+        return self._objects[path]
+
+    def get_model(self, path: Path) -> Model:
+        """Return model saved at path. The model is shared and must not be changed."""
+        model = self.load(path)
+        if not isinstance(model, Model):
+            message = f"Expected Model in {path}, got {type(model).__name__}."
+            raise TypeError(message)
+        return model
+
+    def get_db(self, path: Path) -> CacheDB:
+        """Return CacheDB for model saved at path. Query results are cached in it and shared by all callers."""
+        if path not in self._dbs:
+            self._dbs[path] = CacheDB(self.get_model(path))
+        return self._dbs[path]
+
+    def get_snapshot(self, path: Path) -> Model:
+        """Return a private copy of model saved at path that can be changed without affecting the cached model."""
+        model = self.get_model(path)
+        if du.has_current_store(path):
+            return du.load(path)
+        return copy.deepcopy(model)
+
+    def invalidate(self, path: Path | None = None) -> None:
+        """Remove object saved at path (or all objects if path is None) from cache, e.g. after the file was written again."""
+        if path is None:
+            self._objects.clear()
+            self._dbs.clear()
+            return
+        self._objects.pop(path, None)
+        self._dbs.pop(path, None)
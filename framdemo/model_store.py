@@ -0,0 +1,128 @@
+"""
+Binary store for Model and solver objects, used by demo_utils.save and demo_utils.load.
+
+A store is a versioned folder (see framdemo.versioned_folder) where each version has two files:
+- arrays.bin holds the raw bytes of all NumPy arrays in the object, each aligned to 64 bytes.
+- index.pickle holds the rest of the object graph, where each array is replaced by a small reference (offset, dtype, shape) into arrays.bin.
+
+Writing a store publishes a new version atomically, so readers always see a complete store, also while it is written again.
+Stores written before versioning (with the two files directly in the folder) are still read.
+
+On load, arrays.bin is memory-mapped copy-on-write. Arrays are views into the mapping, so loading is close to zero-copy,
+array data is paged in from disk only when it is used, and changing a loaded array never writes back to the store.
+"""
+
+import pickle
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from framdemo.versioned_folder import (
+    create_version,
+    discard_version,
+    get_current_version,
+    get_published_mtime,
+    publish_version,
+    read_current_version,
+)
+
+_INDEX_FILE = "index.pickle"
+_ARRAYS_FILE = "arrays.bin"
+_ALIGNMENT = 64
+_MIN_ARRAY_BYTES = 1024  # smaller arrays are kept in the index
+
+
+def is_store(path: Path) -> bool:
+    """Return True if path is a model store."""
+    return _get_store_files_folder(path) is not None
+
+
+def get_store_mtime(path: Path) -> float:
+    """Return time the store at path was written."""
+    if get_current_version(path) is not None:
+        return get_published_mtime(path)
+    return (path / _INDEX_FILE).stat().st_mtime
+
+
+def save_store(obj: object, path: Path) -> None:
+    """Write obj to a model store at path. The store is written to a new version that is published when complete, so path always holds a complete store."""
+    version = create_version(path)
+    try:
+        with (version / _ARRAYS_FILE).open("wb") as arrays_file, (version / _INDEX_FILE).open("wb") as index_file:
+            _StorePickler(index_file, arrays_file).dump(obj)
+    except BaseException:
+        discard_version(version)
+        raise
+    publish_version(version)
+
+
+def load_store(path: Path) -> object:
+    """Read object from model store at path. Arrays are copy-on-write views into the memory-mapped arrays file."""
+    if get_current_version(path) is not None:
+        return read_current_version(path, _load_store_files)
+    return _load_store_files(path)
+
+
+def _load_store_files(folder: Path) -> object:
+    arrays = None
+    if (folder / _ARRAYS_FILE).stat().st_size > 0:
+        arrays = np.memmap(folder / _ARRAYS_FILE, dtype=np.uint8, mode="c")
+    with (folder / _INDEX_FILE).open("rb") as f:
+        return _StoreUnpickler(f, arrays).load()
+
+
+def _get_store_files_folder(path: Path) -> Path | None:
+    """Return folder with the files of the current version of store at path (or path for stores written before versioning), or None if there is no store."""
+    for folder in [get_current_version(path), path]:
+        if folder is not None and (folder / _INDEX_FILE).is_file() and (folder / _ARRAYS_FILE).is_file():
+            return folder
+    return None
+
+
+class _StorePickler(pickle.Pickler):
+    """Pickle object graph to index file, writing NumPy arrays to arrays file."""
+
+    def __init__(self, index_file: BinaryIO, arrays_file: BinaryIO) -> None:
+        super().__init__(index_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._arrays_file = arrays_file
+        self._offset = 0
+        # arrays by id, so an array referenced many times is written once and loaded as one object
+        self._refs: dict[int, tuple[np.ndarray, tuple]] = dict()
+
+    def persistent_id(self, obj: object) -> tuple | None:
+        if type(obj) is not np.ndarray or obj.dtype.hasobject or obj.nbytes < _MIN_ARRAY_BYTES:
+            return None
+        if id(obj) in self._refs:
+            return self._refs[id(obj)][1]
+
+        order = "F" if obj.flags.f_contiguous and not obj.flags.c_contiguous else "C"
+        data = np.ascontiguousarray(obj.T if order == "F" else obj)
+
+        padding = -self._offset % _ALIGNMENT
+        self._arrays_file.write(b"\0" * padding)
+        self._offset += padding
+        ref = ("ndarray", self._offset, obj.dtype, obj.shape, order)
+        self._arrays_file.write(data.data.cast("B"))
+        self._offset += data.nbytes
+
+        self._refs[id(obj)] = (obj, ref)  # keep obj alive so its id is not reused
+        return ref
+
+
+class _StoreUnpickler(pickle.Unpickler):
+    """Unpickle object graph from index file, with arrays as views into memory-mapped arrays file."""
+
+    def __init__(self, index_file: BinaryIO, arrays: np.memmap | None) -> None:
+        super().__init__(index_file)
+        self._arrays = arrays
+        self._loaded: dict[int, np.ndarray] = dict()
+
+    def persistent_load(self, pid: tuple) -> np.ndarray:
+        kind, offset, dtype, shape, order = pid
+        if kind != "ndarray":
+            message = f"Unsupported reference type {kind} in model store."
+            raise pickle.UnpicklingError(message)
+        if offset not in self._loaded:
+            self._loaded[offset] = np.ndarray(shape, dtype=dtype, buffer=self._arrays, offset=offset, order=order)
+        return self._loaded[offset]
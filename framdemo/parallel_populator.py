@@ -0,0 +1,208 @@
+"""
+Populator that reads, parses and validates the database folders of an NVE database in parallel.
+
+Each db_xx folder is handled by its own worker process, which creates the time vectors and curves in the folder,
+and reads and validates its attribute tables. The results are merged into the model in the same order as
+NVEEnergyModelPopulator does it, so the populated model is the same as with the serial populator.
+
+The populator overrides private methods and reads private attributes of NVEEnergyModelPopulator, which may change
+in any fram-data release. It is therefore only used with the fram-data versions in SUPPORTED_FRAM_DATA_VERSIONS.
+With other versions, or if the internals it needs are missing, it warns and populates as NVEEnergyModelPopulator.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+from pathlib import Path
+from time import time
+
+import pandas as pd
+from framcore.components import Component
+from framcore.curves import Curve
+from framcore.expressions import Expr
+from framcore.timevectors import TimeVector
+from framdata import NVEEnergyModelPopulator
+from framdata.database_names._base_names import _BaseComponentsNames
+from framdata.database_names.DatabaseNames import DatabaseNames as DbN
+
+import framdemo.demo_utils  # noqa: F401  # sets the demo event handler, also in worker processes
+
+# fram-data versions the parallel populator is tested with
+SUPPORTED_FRAM_DATA_VERSIONS = ["0.1.1"]
+
+# private internals of NVEEnergyModelPopulator used by the parallel populator
+_REQUIRED_INTERNALS = [
+    "_populate",
+    "_populate_time_vectors",
+    "_populate_curves",
+    "_read_components_data",
+    "_validate_files",
+    "_validate_component_data",
+    "_format_error_message",
+    "_register_id",
+    "_TIME_VECTOR_LIST",
+    "_CURVE_LIST",
+    "_COMPONENT_DICT",
+    "_ATTRIBUTES_DICT",
+]
+
+
+def get_unsupported_reason() -> str | None:
+    """Return why the installed fram-data cannot be populated in parallel, or None if it can."""
+    fram_data_version = version("fram-data")
+    if fram_data_version not in SUPPORTED_FRAM_DATA_VERSIONS:
+        return f"fram-data {fram_data_version} is not one of the supported versions {SUPPORTED_FRAM_DATA_VERSIONS}"
+    missing = [name for name in _REQUIRED_INTERNALS if not hasattr(NVEEnergyModelPopulator, name)]
+    if missing:
+        return f"NVEEnergyModelPopulator in fram-data {fram_data_version} has no {missing}"
+    return None
+
+
+class ParallelNVEEnergyModelPopulator(NVEEnergyModelPopulator):
+    """NVEEnergyModelPopulator that handles each database folder in a separate process."""
+
+    def __init__(self, source: Path | str, validate: bool = True, num_processes: int = 1) -> None:
+        """
+        Initialize populator.
+
+        Args:
+            source (Path | str): Path to database hierarchy.
+            validate (bool): Toggle data validation.
+            num_processes (int): Number of worker processes. With 1, or if the installed fram-data is not supported
+                (see get_unsupported_reason), the serial NVEEnergyModelPopulator is used.
+
+        """
+        super().__init__(source=source, validate=validate)
+        if num_processes > 1:
+            reason = get_unsupported_reason()
+            if reason is not None:
+                self.send_warning_event(f"Populating in a single process because {reason}.")
+                num_processes = 1
+        self._num_processes = num_processes
+        self._folder_results: dict[str, _FolderResult] = dict()
+
+    def _populate(self) -> dict[str, Component | TimeVector | Curve | Expr]:
+        if self._num_processes <= 1:
+            return super()._populate()
+
+        folders = sorted({str(DbN.get_relative_folder_path(database_id)) for database_id in self._get_database_ids()})
+
+        t = time()
+        with ProcessPoolExecutor(max_workers=min(self._num_processes, len(folders))) as pool:
+            futures = [pool.submit(_read_database_folder, self._source, self._validate, folder) for folder in folders]
+            for future in futures:
+                result = future.result()
+                self._folder_results[result.folder] = result
+                self.send_info_event(f"Read and validated {result.folder} in {round(result.seconds, 3)} s")
+        self.send_info_event(f"Read and validated {len(folders)} database folders in parallel in {round(time() - t, 3)} s")
+
+        return super()._populate()
+
+    def _get_database_ids(self) -> list[str]:
+        return [database_id for database_id, __ in self._TIME_VECTOR_LIST] + self._CURVE_LIST + list(self._COMPONENT_DICT) + list(self._ATTRIBUTES_DICT)
+
+    def _get_folder_result(self, database_id: str) -> "_FolderResult":
+        return self._folder_results[str(DbN.get_relative_folder_path(database_id))]
+
+    def _populate_time_vectors(self) -> None:
+        if not self._folder_results:
+            super()._populate_time_vectors()
+            return
+        for database_id, __ in self._TIME_VECTOR_LIST:
+            self._add_loaded_objects(database_id, self._get_folder_result(database_id).time_vectors)
+
+    def _populate_curves(self) -> None:
+        if not self._folder_results:
+            super()._populate_curves()
+            return
+        for database_id in self._CURVE_LIST:
+            self._add_loaded_objects(database_id, self._get_folder_result(database_id).curves)
+
+    def _add_loaded_objects(self, database_id: str, loaded: dict[str, tuple[Path, dict[str, TimeVector | Curve]]]) -> None:
+        if database_id not in loaded:
+            self.send_info_event(f"Could not find file {database_id} in {self._source}. Skipping..")
+            return
+        relative_loc, objects = loaded[database_id]
+        for new_id in objects:
+            self._register_id(new_id, self._source / relative_loc)
+        self._data.update(objects)
+
+    def _read_components_data(self, names_map: dict[str, _BaseComponentsNames]) -> dict[str, tuple[pd.DataFrame, pd.DataFrame]]:
+        if not self._folder_results:
+            return super()._read_components_data(names_map)
+        files_map = dict()
+        for database_id in names_map:
+            tables = self._get_folder_result(database_id).tables
+            if database_id not in tables:
+                self.send_info_event(f"Could not find attribute file {database_id} in {self._source}. Skipping..")
+                continue
+            files_map[database_id] = tables[database_id]
+        return files_map
+
+    def _validate_files(self, files_map: dict[str, tuple[pd.DataFrame, pd.DataFrame]], names_map: dict[str, _BaseComponentsNames]) -> None:
+        if not self._folder_results:
+            super()._validate_files(files_map, names_map)
+            return
+        for database_id in names_map:
+            relative_loc = files_map[database_id][2]
+            errors = self._get_folder_result(database_id).validation_errors
+            if relative_loc in errors:
+                self._validation_errors[relative_loc] = errors[relative_loc]
+
+        if self._validation_errors:
+            warnings, message = self._format_error_message(self._validation_errors)
+            if warnings:
+                self.send_warning_event(message)
+            else:
+                raise ValueError(message)
+
+
+class _FolderResult:
+    """Objects and tables read from one database folder by a worker process."""
+
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+        self.time_vectors: dict[str, tuple[Path, dict[str, TimeVector]]] = dict()
+        self.curves: dict[str, tuple[Path, dict[str, Curve]]] = dict()
+        self.tables: dict[str, tuple[pd.DataFrame, pd.DataFrame, Path]] = dict()
+        self.validation_errors: dict[Path, dict[str, pd.DataFrame]] = dict()
+        self.seconds = 0.0
+
+
+def _read_database_folder(source: Path, validate: bool, folder: str) -> _FolderResult:
+    """Create time vectors and curves, and read and validate attribute tables, for all database files in folder."""
+    t = time()
+    result = _FolderResult(folder)
+    populator = NVEEnergyModelPopulator(source=source, validate=validate)
+    interpreter = populator.database_interpreter
+    manager = populator.data_object_manager
+
+    def is_in_folder(database_id: str) -> bool:
+        return str(DbN.get_relative_folder_path(database_id)) == folder
+
+    for database_id, require_whole_years in NVEEnergyModelPopulator._TIME_VECTOR_LIST:
+        if is_in_folder(database_id):
+            __, relative_loc = interpreter.get_source_and_relative_loc(database_id)
+            if relative_loc is not None:
+                result.time_vectors[database_id] = (relative_loc, manager.create_time_vectors(source, relative_loc, require_whole_years))
+
+    for database_id in NVEEnergyModelPopulator._CURVE_LIST:
+        if is_in_folder(database_id):
+            __, relative_loc = interpreter.get_source_and_relative_loc(database_id)
+            if relative_loc is not None:
+                result.curves[database_id] = (relative_loc, manager.create_curves(source, relative_loc))
+
+    names_maps = NVEEnergyModelPopulator._ATTRIBUTES_DICT | NVEEnergyModelPopulator._COMPONENT_DICT
+    for database_id, names_class in names_maps.items():
+        if is_in_folder(database_id):
+            __, relative_loc = interpreter.get_source_and_relative_loc(database_id)
+            if relative_loc is None:
+                continue
+            component_df, meta_df = interpreter.read_attribute_table(database_id)
+            result.tables[database_id] = (component_df, meta_df, relative_loc)
+            if validate:
+                errors = NVEEnergyModelPopulator._validate_component_data(names_class, component_df, meta_df)
+                if errors:
+                    result.validation_errors[relative_loc] = errors
+
+    result.seconds = time() - t
+    return result
@@ -0,0 +1,147 @@
+"""
+Pickle files with NumPy arrays stored out-of-band, used by demo_utils.save and demo_utils.load when MODEL_FORMAT is "pickle".
+
+Objects are pickled with protocol 5. The data of large NumPy arrays is not copied into the pickle stream, but written
+buffer by buffer to a sidecar file <name>.buffers, so memory use stays flat while saving.
+Without compression, the sidecar file is memory-mapped copy-on-write on load, so array data is not copied.
+With zstd or lz4 compression (needs the zstandard or lz4 package), both files are compressed as streams
+and array data is decompressed into new memory on load.
+
+Plain pickle files (e.g. model.pickle written by Solver.solve) are read as usual.
+"""
+
+import io
+import mmap
+import pickle
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+COMPRESSIONS = [None, "zstd", "lz4"]
+
+_ALIGNMENT = 64
+_MIN_BUFFER_BYTES = 1024  # smaller buffers are kept in the pickle stream
+_HEADER = struct.Struct("<Q")  # size of buffer
+_MAGIC = {b"\x28\xb5\x2f\xfd": "zstd", b"\x04\x22\x4d\x18": "lz4"}
+_PACKAGES = {"zstd": "zstandard", "lz4": "lz4"}
+
+
+def get_buffers_path(path: Path) -> Path:
+    """Return path of sidecar file with out-of-band buffers for pickle file at path."""
+    return path.with_name(f"{path.name}.buffers")
+
+
+def dump_pickle(obj: object, path: Path, compression: str | None = None) -> None:
+    """Write obj to pickle file at path, with array data in sidecar file. compression is one of COMPRESSIONS."""
+    if compression not in COMPRESSIONS:
+        message = f"Unsupported compression {compression}. Expected one of {COMPRESSIONS}."
+        raise ValueError(message)
+    buffers_path = get_buffers_path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_buffers_path = buffers_path.with_name(f"{buffers_path.name}.tmp")
+    try:
+        with _open_write(tmp_path, compression) as f, _open_write(tmp_buffers_path, compression) as buffers_file:
+            writer = _BufferWriter(buffers_file)
+            pickle.dump(obj, f, protocol=5, buffer_callback=writer.write)
+        if writer.get_num_buffers() > 0:
+            tmp_buffers_path.replace(buffers_path)
+        else:
+            buffers_path.unlink(missing_ok=True)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+        tmp_buffers_path.unlink(missing_ok=True)
+
+
+def load_pickle(path: Path) -> object:
+    """Read object from pickle file at path, written by dump_pickle or as plain pickle."""
+    with _open_read(path) as f:
+        return pickle.load(f, buffers=_read_buffers(get_buffers_path(path)))
+
+
+class _BufferWriter:
+    """Write out-of-band buffers to sidecar file. Each buffer is a size header followed by data aligned to 64 bytes."""
+
+    def __init__(self, file: BinaryIO) -> None:
+        self._file = file
+        self._offset = 0
+        self._num_buffers = 0
+
+    def get_num_buffers(self) -> int:
+        return self._num_buffers
+
+    def write(self, buffer: pickle.PickleBuffer) -> bool:
+        """Write buffer to file and return False, or return True to keep a small buffer in the pickle stream."""
+        data = buffer.raw()
+        if data.nbytes < _MIN_BUFFER_BYTES:
+            return True
+        self._file.write(_HEADER.pack(data.nbytes))
+        padding = -(self._offset + _HEADER.size) % _ALIGNMENT
+        self._file.write(b"\0" * padding)
+        self._file.write(data)
+        self._offset += _HEADER.size + padding + data.nbytes
+        self._num_buffers += 1
+        return False
+
+
+def _read_buffers(path: Path) -> Iterator[memoryview | bytearray]:
+    """Yield buffers from sidecar file. The file is only opened if the pickle stream refers to out-of-band buffers."""
+    with path.open("rb") as f:
+        compression = _MAGIC.get(f.read(4))
+    if compression is None:
+        with path.open("rb") as f:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        offset = 0
+        while offset < len(view):
+            (size,) = _HEADER.unpack(view[offset : offset + _HEADER.size])
+            start = offset + _HEADER.size + (-(offset + _HEADER.size) % _ALIGNMENT)
+            yield view[start : start + size]
+            offset = start + size
+        return
+
+    with _open_read(path) as f:
+        offset = 0
+        while header := f.read(_HEADER.size):
+            (size,) = _HEADER.unpack(header)
+            padding = -(offset + _HEADER.size) % _ALIGNMENT
+            f.read(padding)
+            buffer = bytearray(size)
+            f.readinto(buffer)
+            yield buffer
+            offset += _HEADER.size + padding + size
+
+
+def _open_write(path: Path, compression: str | None) -> BinaryIO:
+    if compression is None:
+        return path.open("wb")
+    module = _import_compression(compression)
+    if compression == "zstd":
+        return module.ZstdCompressor(level=3).stream_writer(path.open("wb"))
+    return module.frame.open(path, "wb")
+
+
+def _open_read(path: Path) -> BinaryIO:
+    with path.open("rb") as f:
+        compression = _MAGIC.get(f.read(4))
+    if compression is None:
+        return path.open("rb")
+    module = _import_compression(compression)
+    if compression == "zstd":
+        return io.BufferedReader(module.ZstdDecompressor().stream_reader(path.open("rb")))
+    return module.frame.open(path, "rb")
+
+
+def _import_compression(compression: str):
+    package = _PACKAGES[compression]
+    try:
+        if compression == "zstd":
+            import zstandard
+
+            return zstandard
+        import lz4.frame
+
+        return lz4
+    except ImportError as e:
+        message = f"Compression {compression} needs the {package} package. Install it with 'pip install {package}'."
+        raise ImportError(message) from e
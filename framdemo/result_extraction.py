@@ -0,0 +1,364 @@
+"""
+Extraction of dashboard results (prices, regional volumes and hydro data) from solved models, used by demo_7_get_data.
+
+Each solve is independent, so solves can be extracted in parallel, one solve per worker process. A worker loads the model
+of its solve once, queries all result vectors and returns them in a shared memory block instead of pickling them back
+to the parent process. Results are returned in solve order, so the parent writes the same files as when solves are
+extracted one after the other.
+
+A solve can also be extracted as soon as it is solved, before the other solves are done, with extract_and_save_solve
+(used as a stage by run_all). Results are saved in the solve folder, and extract_solve uses them instead of querying
+the model again as long as they are newer than the model of the solve and were extracted with the same settings and
+the same extraction code (this module and the framdemo modules it imports, see code_fingerprint).
+"""
+
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from time import time
+
+import numpy as np
+import pandas as pd
+from framcore.aggregators import HydroAggregator, NodeAggregator
+from framcore.components import HydroModule, Node
+from framcore.events import send_info_event
+from framcore.querydbs import CacheDB
+from framcore.timeindexes import AverageYearRange, DailyIndex, ModelYear
+from framcore.utils import RegionalVolumes, get_regional_volumes
+from framjules import JulES
+
+import framdemo.demo_utils as du
+from framdemo.batch_queries import get_scenario_matrix
+from framdemo.code_fingerprint import get_code_hash
+from framdemo.model_cache import ModelCache
+from framdemo.tracing import span
+
+SECTIONS = ["prices", "volumes", "hydro"]
+HYDRO_COUNTRIES = ["Norway", "Sweden", "Finland"]
+CATEGORY_TOTAL = "Total"
+VOLUME_DIRECTIONS = ["Production", "Consumption", "Import", "Export"]
+VOLUME_LABELS = ["solve", "country", "direction", "category"]
+
+_ALIGNMENT = 64
+
+
+class ExtractionSettings:
+    """Query settings shared by all solves."""
+
+    def __init__(
+        self,
+        daily_index: DailyIndex,
+        data_period: ModelYear,
+        first_simulation_year: int,
+        num_simulation_years: int,
+        price_unit: str,
+        hydro_countries: list[str],
+    ) -> None:
+        """Create settings for queries over daily_index and data_period, with prices in price_unit and hydro data for hydro_countries."""
+        self.daily_index = daily_index
+        self.data_period = data_period
+        self.first_simulation_year = first_simulation_year
+        self.num_simulation_years = num_simulation_years
+        self.price_unit = price_unit
+        self.hydro_countries = hydro_countries
+
+    def get_key(self) -> tuple:
+        """Return key that is equal for settings that give the same results, saved with results to check if they can be reused."""
+        return (str(self.data_period), self.first_simulation_year, self.num_simulation_years, self.price_unit, tuple(self.hydro_countries))
+
+
+def get_extraction_settings(jules: JulES, hydro_countries: list[str] = HYDRO_COUNTRIES) -> ExtractionSettings:
+    """Return query settings for all solves from the config of a solver (daily prices over the simulation years, in its currency)."""
+    config = jules.get_config()
+    first_simulation_year, num_simulation_years = config.get_simulation_years()
+    return ExtractionSettings(
+        daily_index=DailyIndex(first_simulation_year, num_simulation_years),
+        data_period=config.get_data_period(),
+        first_simulation_year=first_simulation_year,
+        num_simulation_years=num_simulation_years,
+        price_unit=f"{config.get_currency()}/MWh",
+        hydro_countries=hydro_countries,
+    )
+
+
+class SolveResults:
+    """Result vectors of one solve, for each section by key (relative to the solve) in the order they are written."""
+
+    def __init__(self, solve_name: str) -> None:
+        self.solve_name = solve_name
+        self.sections: dict[str, dict[str, np.ndarray]] = {section: dict() for section in SECTIONS}
+        self.seconds = 0.0
+
+
+def extract_solves(
+    solve_names: list[str],
+    settings: ExtractionSettings,
+    num_processes: int = 1,
+    cache: ModelCache | None = None,
+) -> Iterator[tuple[str, SolveResults | None]]:
+    """
+    Yield (solve name, results) in solve order. Results are None if the solve has no model.
+
+    With num_processes > 1, solves are extracted in parallel in worker processes. Results are yielded as soon as
+    they and the results of all earlier solves are done. Otherwise models are loaded into cache (if given), so the
+    caller can use them after extraction without loading them again.
+    """
+    if num_processes <= 1 or len(solve_names) <= 1:
+        for solve_name in solve_names:
+            yield solve_name, extract_solve(solve_name, settings, cache)
+        return
+
+    if os.name == "posix":
+        # start tracker of shared memory blocks before workers, so workers and parent share it
+        # and a block created by a worker is not reported as leaked when the worker exits
+        resource_tracker.ensure_running()
+
+    with ProcessPoolExecutor(max_workers=min(num_processes, len(solve_names))) as pool:
+        futures = [pool.submit(_extract_solve_to_shared_memory, solve_name, settings) for solve_name in solve_names]
+        for solve_name, future in zip(solve_names, futures, strict=True):
+            shared = future.result()
+            yield solve_name, None if shared is None else _read_shared_memory(solve_name, *shared)
+
+
+def extract_and_save_solve(solve_name: str, reference_solve_name: str = "base") -> None:
+    """
+    Extract results of solve with settings from the solver of reference_solve_name (as demo_7_get_data), and save them in the solve folder.
+
+    Does nothing if the solve has no model or already has saved results that are up to date.
+    """
+    jules: JulES = du.load(du.DEMO_FOLDER / reference_solve_name / "solver.pickle")
+    settings = get_extraction_settings(jules)
+    if _load_saved_results(solve_name, settings) is not None:
+        return
+    results = extract_solve(solve_name, settings)
+    if results is None:
+        return
+    saved = {"settings": settings.get_key(), "code": get_code_hash([__name__]), "sections": results.sections, "seconds": results.seconds}
+    du.save(saved, get_saved_results_path(solve_name))
+
+
+def get_saved_results_path(solve_name: str) -> Path:
+    """Return path of results of solve saved by extract_and_save_solve."""
+    return du.DEMO_FOLDER / solve_name / "dashboard_results.pickle"
+
+
+def extract_solve(solve_name: str, settings: ExtractionSettings, cache: ModelCache | None = None) -> SolveResults | None:
+    """
+    Query prices, regional volumes and hydro data for solve. Return None if the solve has no model.
+
+    Results saved by extract_and_save_solve are returned instead if they are up to date. The model and its CacheDB are
+    loaded into cache (a new ModelCache if None), and taken from it if they are already loaded.
+    """
+    saved = _load_saved_results(solve_name, settings)
+    if saved is not None:
+        send_info_event(extract_solve, f"Using saved results for solve {solve_name}")
+        return saved
+
+    t = time()
+    model_path = du.DEMO_FOLDER / solve_name / "model.pickle"
+    if not du.exists(model_path):
+        return None
+    cache = ModelCache() if cache is None else cache
+    with span("load model", solve=solve_name):
+        cache.get_model(model_path)
+
+    send_info_event(extract_solve, f"Extracting results for solve {solve_name}")
+    results = SolveResults(solve_name)
+    with span("extract prices", solve=solve_name):
+        _extract_prices(cache, model_path, settings, results.sections["prices"])
+    with span("extract volumes", solve=solve_name):
+        _extract_volumes(cache, model_path, solve_name, settings, results.sections["volumes"])
+    with span("extract hydro", solve=solve_name):
+        _extract_hydro(cache, model_path, solve_name, settings, results.sections["hydro"])
+    results.seconds = time() - t
+    return results
+
+
+def _load_saved_results(solve_name: str, settings: ExtractionSettings) -> SolveResults | None:
+    """Return results saved for solve, or None if there are none, they are older than the model of the solve or have other settings or code."""
+    path = get_saved_results_path(solve_name)
+    model_path = du.DEMO_FOLDER / solve_name / "model.pickle"
+    if not (du.exists(path) and du.exists(model_path)) or du.get_mtime(path) < du.get_mtime(model_path):
+        return None
+    saved = du.load(path)
+    if saved["settings"] != settings.get_key() or saved.get("code") != get_code_hash([__name__]):
+        return None
+    results = SolveResults(solve_name)
+    results.sections = saved["sections"]
+    results.seconds = saved["seconds"]
+    return results
+
+
+def _extract_prices(cache: ModelCache, model_path: Path, settings: ExtractionSettings, out: dict[str, np.ndarray]) -> None:
+    db = cache.get_db(model_path)
+    nodes = {key: value for key, value in db.get_data().items() if isinstance(value, Node) and value.get_commodity() == "Power"}
+
+    # one batched query for all power nodes (zones x days)
+    prices = get_scenario_matrix(db, [node.get_price() for node in nodes.values()], settings.daily_index, settings.data_period, settings.price_unit)
+    for key, vector in zip(nodes, prices, strict=True):
+        sanitized_zone = key.replace(" ", "_")
+        out[sanitized_zone] = vector
+
+
+def _extract_volumes(cache: ModelCache, model_path: Path, solve_name: str, settings: ExtractionSettings, out: dict[str, np.ndarray]) -> None:
+    regional_volumes = get_regional_volumes(
+        cache.get_db(model_path),
+        commodity="Power",
+        node_category="Country",
+        production_category="HighLevelSource",
+        consumption_category="TotalConsumption",
+        data_period=settings.data_period,
+        scenario_period=AverageYearRange(settings.first_simulation_year, settings.num_simulation_years),
+        unit="GWh/year",
+    )
+    table = get_volume_table(regional_volumes, solve_name)
+
+    # keys country/direction/category, one vector per key (rows of the table are grouped by key and sorted by period)
+    num_periods = table["period"].nunique()
+    labels = table.iloc[::num_periods] if num_periods else table
+    keys = labels["country"].astype(str) + "/" + labels["direction"].astype(str) + "/" + labels["category"].astype(str)
+    values = table["volume"].to_numpy().reshape((len(keys), num_periods))
+    out.update(zip(keys, values, strict=True))
+
+
+def get_volume_table(regional_volumes: RegionalVolumes, solve_name: str) -> pd.DataFrame:
+    """
+    Return regional volumes as one long-format table with columns solve, country, direction, category, period and volume.
+
+    Direction is Production, Consumption, Import or Export. Category is the production or consumption category
+    (NA if missing), or the trading partner for Import and Export. Each country and direction also has a Total category,
+    summed over the other categories. Spaces in countries and trading partners are replaced by _ (production and
+    consumption categories keep their spaces, as in the dashboard keys), and rows are grouped by
+    (country, direction, category) with periods in order.
+    """
+    labels = []
+    vectors = []
+    directions = [regional_volumes.get_production(), regional_volumes.get_consumption(), regional_volumes.get_import(), regional_volumes.get_export()]
+    for direction, d in zip(VOLUME_DIRECTIONS, directions, strict=True):
+        for country, category_data in d.items():
+            for category, volume in category_data.items():
+                labels.append((country, direction, category))
+                vectors.append(volume)
+    columns = [*VOLUME_LABELS, "period", "volume"]
+    if not vectors:
+        return pd.DataFrame(columns=columns)
+
+    # one row per (country, direction, category) and period, built from one 2-D array of all volumes
+    values = np.stack(vectors)
+    num_keys, num_periods = values.shape
+    labels = pd.DataFrame(labels, columns=["country", "direction", "category"])
+    labels["country"] = labels["country"].str.replace(" ", "_")
+    labels["category"] = labels["category"].fillna("NA").astype(str)
+    is_trade = labels["direction"].isin(["Import", "Export"])
+    labels.loc[is_trade, "category"] = labels.loc[is_trade, "category"].str.replace(" ", "_")
+    assert not (labels["category"] == CATEGORY_TOTAL).any()
+    table = pd.DataFrame({name: np.repeat(labels[name].to_numpy(), num_periods) for name in labels.columns})
+    table["period"] = np.tile(np.arange(num_periods), num_keys)
+    table["volume"] = values.ravel()
+    table["order"] = np.repeat(np.arange(num_keys, dtype=np.float64), num_periods)
+
+    # totals per country, direction and period as one grouped sum, placed after the last category of each country and direction
+    totals = table.groupby(["country", "direction", "period"], sort=False).agg(volume=("volume", "sum"), order=("order", "max")).reset_index()
+    totals["category"] = CATEGORY_TOTAL
+    totals["order"] += 0.5
+    table = pd.concat([table, totals], ignore_index=True)
+    table = table.sort_values(["order", "period"], ignore_index=True)
+
+    table.insert(0, "solve", solve_name)
+    for name in VOLUME_LABELS:
+        table[name] = table[name].astype("category")
+    return table[columns]
+
+
+def _extract_hydro(cache: ModelCache, model_path: Path, solve_name: str, settings: ExtractionSettings, out: dict[str, np.ndarray]) -> None:
+    daily_index = settings.daily_index
+    data_period = settings.data_period
+
+    # the model is changed below, so work on a copy-on-write snapshot of the cached model
+    model = cache.get_snapshot(model_path)
+
+    if solve_name != "detailed":
+        model.disaggregate()
+
+    node_aggregator = NodeAggregator("Power", "Country", data_period, daily_index)
+    node_aggregator.aggregate(model)
+    hydro_aggregator = HydroAggregator("EnergyEqDownstream", data_period, daily_index)
+    hydro_aggregator.aggregate(model)
+
+    db = CacheDB(model)
+
+    data = dict()
+    for country in settings.hydro_countries:
+        data[country] = dict()
+        for category in ["reservoir_volume", "reservoir_capacity", "production", "inflow"]:
+            data[country][category] = np.zeros(daily_index.get_num_periods(), dtype=np.float32)
+
+    for v in db.get_data().values():
+        if not isinstance(v, HydroModule):
+            continue
+
+        # works since hydro module is aggregated to country
+        country = v.get_generator().get_power_node()
+
+        reservoir = v.get_reservoir()
+        if reservoir is not None:
+            data[country]["reservoir_volume"] += reservoir.get_volume().get_scenario_vector(db, daily_index, data_period, "Mm3")
+            data[country]["reservoir_capacity"] += reservoir.get_capacity().get_scenario_vector(db, daily_index, data_period, "Mm3")
+
+        production = v.get_generator().get_production()
+        data[country]["production"] += production.get_scenario_vector(db, daily_index, data_period, "MW")
+
+        inflow = v.get_inflow()
+        if inflow is not None:
+            data[country]["inflow"] += inflow.get_scenario_vector(db, daily_index, data_period, "m3/s")
+
+    for country, area_data in data.items():
+        if float(area_data["reservoir_capacity"].max()) == 0:
+            area_data["reservoir_percentage"] = area_data["reservoir_capacity"]
+        else:
+            area_data["reservoir_percentage"] = area_data["reservoir_volume"] / area_data["reservoir_capacity"]
+
+    for country, area_data in data.items():
+        for key, vector in area_data.items():
+            out[f"{country}/{key}"] = vector
+
+
+def _extract_solve_to_shared_memory(solve_name: str, settings: ExtractionSettings) -> tuple[str, list[tuple], float] | None:
+    """Extract solve in worker process and copy result vectors into a new shared memory block. Return (block name, index, seconds)."""
+    results = extract_solve(solve_name, settings)
+    if results is None:
+        return None
+
+    index = []
+    arrays = []
+    offset = 0
+    for section, vectors in results.sections.items():
+        for key, vector in vectors.items():
+            array = np.ascontiguousarray(vector)
+            offset += -offset % _ALIGNMENT
+            index.append((section, key, offset, array.dtype, array.shape))
+            arrays.append(array)
+            offset += array.nbytes
+
+    shm = SharedMemory(create=True, size=max(offset, 1))
+    for (__, __, start, __, __), array in zip(index, arrays, strict=True):
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=start)[...] = array
+    shm.close()  # the parent process unlinks the block when it has read it
+    return shm.name, index, results.seconds
+
+
+def _read_shared_memory(solve_name: str, name: str, index: list[tuple], seconds: float) -> SolveResults:
+    """Copy result vectors out of shared memory block written by a worker process, and free the block."""
+    results = SolveResults(solve_name)
+    results.seconds = seconds
+    shm = SharedMemory(name=name)
+    try:
+        for section, key, offset, dtype, shape in index:
+            results.sections[section][key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return results
@@ -0,0 +1,456 @@
+"""
+Result files for the dashboard with one table per solve and metric (e.g. the daily price of all zones in a solve).
+
+A table has named columns (e.g. zones) with one value per period, and optionally names for the periods (index).
+ResultStore is the interface used by demo_7_get_data and the dashboard, with these backends:
+
+- "hdf5" (HDF5ResultStore): one HDF5 file. Each table is one chunked and compressed 2-D array with a row for each
+  column of the table, plus an index with the column names. Each row is one chunk, so a column can be read without
+  reading the rest.
+- "parquet" and "arrow" (ArrowResultStore): a folder with one file per metric and solve, partitioned by solve
+  (<metric>/solve=<solve_name>/part-0.parquet). Tables are stored in long format (column, period, value) sorted by column,
+  so reading a subset of columns (e.g. zones or countries) is pushed down to the file reader. Parquet files are
+  compressed. Arrow IPC files are uncompressed and memory-mapped on read. Each solve is written to its own file,
+  so several processes can write results at once without a file lock. The folder is a versioned folder
+  (see framdemo.versioned_folder), so a new store is published atomically. Needs the pyarrow package.
+
+Use open_result_store to create or open a store from a path without suffix (e.g. demo_folder/dashboard_prices).
+"""
+
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from types import TracebackType
+
+import numpy as np
+import pandas as pd
+import tables
+from numpy.typing import NDArray
+
+from framdemo.versioned_folder import (
+    create_version,
+    discard_version,
+    get_current_version,
+    get_published_mtime,
+    publish_version,
+)
+
+RESULT_STORE_FORMATS = ["hdf5", "parquet", "arrow"]
+
+_SUFFIXES = {"hdf5": ".h5", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def get_result_store_path(path: Path, store_format: str) -> Path:
+    """Return path of result store in store_format for path without suffix (e.g. dashboard_prices.h5 for dashboard_prices)."""
+    if store_format not in RESULT_STORE_FORMATS:
+        message = f"Unsupported result store format {store_format}. Expected one of {RESULT_STORE_FORMATS}."
+        raise ValueError(message)
+    return path.with_name(path.name + _SUFFIXES[store_format])
+
+
+def find_result_store(path: Path) -> tuple[Path, str] | None:
+    """Return (path, format) of the most recently written result store for path without suffix, or None if there is none."""
+    found = [(get_result_store_path(path, f), f) for f in RESULT_STORE_FORMATS if get_result_store_path(path, f).exists()]
+    if not found:
+        return None
+    return max(found, key=lambda item: get_result_store_mtime(item[0]))
+
+
+def get_result_store_mtime(store_path: Path) -> float:
+    """Return time the result store at store_path (e.g. dashboard_prices.h5 or dashboard_prices.arrow) was last written."""
+    if store_path.is_dir():
+        if get_current_version(store_path) is not None:
+            return get_published_mtime(store_path)
+        return max([store_path.stat().st_mtime] + [p.stat().st_mtime for p in store_path.rglob("*")])  # written before versioning
+    return store_path.stat().st_mtime
+
+
+def open_result_store(path: Path, mode: str = "r", store_format: str | None = None) -> "ResultStore":
+    """
+    Open result store for path without suffix.
+
+    With mode "w", a new store in store_format is created (replacing an existing one).
+    With mode "r", the store in store_format is opened, or the most recently written store if store_format is None.
+    """
+    if mode == "w" or store_format is not None:
+        store_path = get_result_store_path(path, store_format)
+    else:
+        found = find_result_store(path)
+        if found is None:
+            message = f"No result store found for {path} (expected one of {[get_result_store_path(path, f).name for f in RESULT_STORE_FORMATS]})."
+            raise FileNotFoundError(message)
+        store_path, store_format = found
+
+    if store_format == "hdf5":
+        return HDF5ResultStore(store_path, mode=mode)
+    return ArrowResultStore(store_path, mode=mode, file_format=store_format)
+
+
+def stack_vectors(vectors: dict[str, NDArray], num_periods: int) -> tuple[list[str], NDArray]:
+    """Return (columns, values) for ResultStore.write_table with one column per vector. num_periods is used if vectors is empty."""
+    if not vectors:
+        return [], np.empty((0, num_periods), dtype=np.float32)
+    return list(vectors), np.stack([np.asarray(vector) for vector in vectors.values()])
+
+
+class ResultStore(ABC):
+    """
+    Tables of results for each solve and metric. Open with mode "r" to read or "w" to create a new store.
+
+    Used as a context manager, a store opened with mode "w" replaces the previous store at its path when the with block
+    ends, or is discarded (keeping the previous store) if the with block raises an exception.
+    """
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def close(self) -> None:
+        """Close store."""
+
+    def discard(self) -> None:
+        """Close store without replacing the previous store at path with what was written (mode "w")."""
+        self.close()
+
+    @abstractmethod
+    def set_metadata(self, metadata: dict) -> None:
+        """Set metadata common for all solves."""
+
+    @abstractmethod
+    def get_metadata(self) -> dict:
+        """Return metadata common for all solves (empty if not set)."""
+
+    @abstractmethod
+    def write_table(self, solve_name: str, metric: str, columns: list[str], values: NDArray, index: list[str] | None = None) -> None:
+        """
+        Write table for solve and metric.
+
+        values has one row for each column name and one column for each period.
+        index gives names of the periods (default is 0, 1, 2, ...).
+        """
+
+    @abstractmethod
+    def get_solve_names(self) -> list[str]:
+        """Return names of solves in store."""
+
+    @abstractmethod
+    def get_metrics(self, solve_name: str) -> list[str]:
+        """Return metrics stored for solve."""
+
+    @abstractmethod
+    def has_table(self, solve_name: str, metric: str) -> bool:
+        """Return True if store has table for solve and metric."""
+
+    @abstractmethod
+    def get_columns(self, solve_name: str, metric: str) -> list[str]:
+        """Return column names of table for solve and metric, in the order they were written."""
+
+    @abstractmethod
+    def get_num_periods(self, solve_name: str, metric: str) -> int:
+        """Return number of periods (rows) of table for solve and metric."""
+
+    @abstractmethod
+    def read_table(self, solve_name: str, metric: str, columns: list[str] | None = None) -> pd.DataFrame:
+        """Return table for solve and metric as DataFrame with one column per name and one row per period. Only the given columns are read."""
+
+    @staticmethod
+    def _check_table(solve_name: str, metric: str, columns: list[str], values: NDArray, index: list[str] | None) -> None:
+        if values.ndim != 2 or values.shape[0] != len(columns):
+            message = f"Expected values with shape ({len(columns)}, number of periods) for {solve_name}/{metric}, got {values.shape}."
+            raise ValueError(message)
+        if index is not None and len(index) != values.shape[1]:
+            message = f"Expected index with {values.shape[1]} names for {solve_name}/{metric}, got {len(index)}."
+            raise ValueError(message)
+
+    @staticmethod
+    def _check_columns(solve_name: str, metric: str, columns: list[str], all_columns: list[str]) -> None:
+        missing = sorted(set(columns).difference(all_columns))
+        if missing:
+            message = f"Columns {missing} not found in {solve_name}/{metric}."
+            raise KeyError(message)
+
+
+_FILTERS = tables.Filters(complevel=4, complib="zlib", shuffle=True)
+
+
+class HDF5ResultStore(ResultStore):
+    """
+    Result store in one HDF5 file.
+
+    File layout:
+        /<solve_name>/<metric>/values    2-D array (number of columns x number of periods)
+        /<solve_name>/<metric>/columns   column names
+        /<solve_name>/<metric>/index     period names (if given)
+        root attribute global_metadata   metadata dict common for all solves
+    """
+
+    def __init__(self, path: Path, mode: str = "r") -> None:
+        """
+        Open result file at path with mode "r" or "w".
+
+        With mode "w", the file is written to a temporary file that replaces the file at path on close, so readers
+        that have the old file open (e.g. the dashboard) are not affected while it is written.
+        """
+        if mode not in ("r", "w"):
+            message = f"Unsupported mode {mode}. Expected 'r' or 'w'."
+            raise ValueError(message)
+        self._path = Path(path)
+        self._tmp_path = self._path.with_name(self._path.name + ".tmp") if mode == "w" else None
+        self._file = tables.open_file(str(self._tmp_path or self._path), mode=mode)
+
+    def close(self) -> None:
+        """Close file."""
+        if not self._file.isopen:
+            return
+        self._file.close()
+        if self._tmp_path is not None:
+            self._tmp_path.replace(self._path)
+
+    def discard(self) -> None:
+        """Close file and delete the temporary file (mode "w"), keeping the previous file at path."""
+        if self._file.isopen:
+            self._file.close()
+        if self._tmp_path is not None:
+            self._tmp_path.unlink(missing_ok=True)
+            self._tmp_path = None
+
+    def set_metadata(self, metadata: dict) -> None:
+        """Set metadata common for all solves."""
+        self._file.root._v_attrs.global_metadata = metadata
+
+    def get_metadata(self) -> dict:
+        """Return metadata common for all solves (empty if not set)."""
+        return getattr(self._file.root._v_attrs, "global_metadata", dict())
+
+    def write_table(self, solve_name: str, metric: str, columns: list[str], values: NDArray, index: list[str] | None = None) -> None:
+        """Write table for solve and metric. values has one row for each column name, and one column for each period."""
+        self._check_table(solve_name, metric, columns, values, index)
+        group = self._file.create_group(f"/{solve_name}", metric, createparents=True)
+        self._file.create_array(group, "columns", _encode(columns))
+        if index is not None:
+            self._file.create_array(group, "index", _encode(index))
+        if values.size == 0:
+            self._file.create_earray(group, "values", atom=tables.Atom.from_dtype(values.dtype), shape=(0, values.shape[1]))
+            return
+        array = self._file.create_carray(
+            group,
+            "values",
+            atom=tables.Atom.from_dtype(values.dtype),
+            shape=values.shape,
+            filters=_FILTERS,
+            chunkshape=(1, values.shape[1]),
+        )
+        array[:] = values
+
+    def get_solve_names(self) -> list[str]:
+        """Return names of solves in file."""
+        return [group._v_name for group in self._file.list_nodes("/", classname="Group")]
+
+    def get_metrics(self, solve_name: str) -> list[str]:
+        """Return metrics stored for solve."""
+        return [group._v_name for group in self._file.list_nodes(f"/{solve_name}", classname="Group")]
+
+    def has_table(self, solve_name: str, metric: str) -> bool:
+        """Return True if file has table for solve and metric."""
+        return f"/{solve_name}/{metric}/values" in self._file
+
+    def get_columns(self, solve_name: str, metric: str) -> list[str]:
+        """Return column names of table for solve and metric."""
+        return _decode(self._file.get_node(f"/{solve_name}/{metric}/columns").read())
+
+    def get_num_periods(self, solve_name: str, metric: str) -> int:
+        """Return number of periods of table for solve and metric."""
+        return self._file.get_node(f"/{solve_name}/{metric}/values").shape[1]
+
+    def read_table(self, solve_name: str, metric: str, columns: list[str] | None = None) -> pd.DataFrame:
+        """Return table for solve and metric as DataFrame with one column per name and one row per period. Only the given columns are read."""
+        all_columns = self.get_columns(solve_name, metric)
+        values = self._file.get_node(f"/{solve_name}/{metric}/values")
+        index = None
+        if f"/{solve_name}/{metric}/index" in self._file:
+            index = _decode(self._file.get_node(f"/{solve_name}/{metric}/index").read())
+        if columns is None:
+            return pd.DataFrame(values.read().T, columns=all_columns, index=index)
+        self._check_columns(solve_name, metric, columns, all_columns)
+        position = {name: i for i, name in enumerate(all_columns)}
+        return pd.DataFrame({name: values[position[name]] for name in columns}, columns=columns, index=index)
+
+
+class ArrowResultStore(ResultStore):
+    """
+    Result store in a folder of Parquet or Arrow IPC files, partitioned by solve.
+
+    Folder layout:
+        metadata.json                                  metadata dict common for all solves
+        <metric>/solve=<solve_name>/part-0.<format>    table in long format with fields column, period and value
+
+    Column names in write order, and period names, are stored in the schema metadata of each file.
+    """
+
+    _METADATA_FILE = "metadata.json"
+    _PARTITION = "solve="
+
+    def __init__(self, path: Path, mode: str = "r", file_format: str = "parquet") -> None:
+        """
+        Open result folder at path with mode "r" or "w". file_format is "parquet" or "arrow".
+
+        With mode "w", the store is written to a new version of the folder that is published on close, so readers
+        always see the previous or the new complete store. With mode "r", the current version is read, and it stays
+        readable until the store is written twice more.
+        """
+        if mode not in ("r", "w"):
+            message = f"Unsupported mode {mode}. Expected 'r' or 'w'."
+            raise ValueError(message)
+        if file_format not in ("parquet", "arrow"):
+            message = f"Unsupported file format {file_format}. Expected 'parquet' or 'arrow'."
+            raise ValueError(message)
+        _import_pyarrow()
+        self._file_format = file_format
+        self._is_writing = mode == "w"
+        if self._is_writing:
+            self._path = create_version(Path(path))
+        elif not Path(path).is_dir():
+            message = f"Result store {path} not found."
+            raise FileNotFoundError(message)
+        else:
+            self._path = get_current_version(Path(path)) or Path(path)  # folders written before versioning have no versions
+
+    def close(self) -> None:
+        """Publish the written version of the folder (mode "w")."""
+        if not self._is_writing:
+            return
+        self._path = publish_version(self._path)
+        self._is_writing = False
+
+    def discard(self) -> None:
+        """Delete the written version of the folder (mode "w"), keeping the previous version."""
+        if not self._is_writing:
+            return
+        discard_version(self._path)
+        self._is_writing = False
+
+    def set_metadata(self, metadata: dict) -> None:
+        """Set metadata common for all solves."""
+        with (self._path / self._METADATA_FILE).open("w") as f:
+            json.dump(metadata, f, indent=2)
+
+    def get_metadata(self) -> dict:
+        """Return metadata common for all solves (empty if not set)."""
+        if not (self._path / self._METADATA_FILE).is_file():
+            return dict()
+        with (self._path / self._METADATA_FILE).open("r") as f:
+            return json.load(f)
+
+    def write_table(self, solve_name: str, metric: str, columns: list[str], values: NDArray, index: list[str] | None = None) -> None:
+        """Write table for solve and metric to its own file. values has one row for each column name, and one column for each period."""
+        pa, pq = _import_pyarrow()
+        self._check_table(solve_name, metric, columns, values, index)
+
+        num_columns, num_periods = values.shape
+        order = sorted(range(num_columns), key=lambda i: columns[i])  # sorted by column, so readers can skip row groups
+        dictionary = pa.array([columns[i] for i in order], type=pa.string())
+        schema_metadata = {b"columns": json.dumps(columns).encode(), b"num_periods": str(num_periods).encode()}
+        if index is not None:
+            schema_metadata[b"index"] = json.dumps(index).encode()
+        table = pa.table(
+            {
+                "column": pa.DictionaryArray.from_arrays(np.repeat(np.arange(num_columns, dtype=np.int32), num_periods), dictionary),
+                "period": np.tile(np.arange(num_periods, dtype=np.int32), num_columns),
+                "value": values[order].reshape(-1),
+            },
+        ).replace_schema_metadata(schema_metadata)
+
+        file_path = self._get_file_path(solve_name, metric)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(file_path.name + ".tmp")
+        if self._file_format == "parquet":
+            row_group_size = max(num_periods, 1) * max(1, 65536 // max(num_periods, 1))
+            pq.write_table(table, tmp_path, compression="zstd", row_group_size=row_group_size)
+        else:
+            with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        tmp_path.replace(file_path)
+
+    def get_solve_names(self) -> list[str]:
+        """Return names of solves with at least one table."""
+        names = {p.name.removeprefix(self._PARTITION) for p in self._path.glob(f"*/{self._PARTITION}*") if p.is_dir()}
+        return sorted(names)
+
+    def get_metrics(self, solve_name: str) -> list[str]:
+        """Return metrics stored for solve."""
+        return sorted(p.parent.parent.name for p in self._path.glob(f"*/{self._PARTITION}{solve_name}/part-0.*") if p.suffix != ".tmp")
+
+    def has_table(self, solve_name: str, metric: str) -> bool:
+        """Return True if store has table for solve and metric."""
+        return self._get_file_path(solve_name, metric).is_file()
+
+    def get_columns(self, solve_name: str, metric: str) -> list[str]:
+        """Return column names of table for solve and metric, read from the file schema."""
+        return json.loads(self._read_schema(solve_name, metric).metadata[b"columns"])
+
+    def get_num_periods(self, solve_name: str, metric: str) -> int:
+        """Return number of periods of table for solve and metric, read from the file schema."""
+        return int(self._read_schema(solve_name, metric).metadata[b"num_periods"])
+
+    def read_table(self, solve_name: str, metric: str, columns: list[str] | None = None) -> pd.DataFrame:
+        """Return table for solve and metric as DataFrame with one column per name and one row per period. Only the given columns are read."""
+        pa, pq = _import_pyarrow()
+        import pyarrow.compute as pc
+
+        file_path = self._get_file_path(solve_name, metric)
+        schema = self._read_schema(solve_name, metric)
+        all_columns = json.loads(schema.metadata[b"columns"])
+        num_periods = int(schema.metadata[b"num_periods"])
+        index = json.loads(schema.metadata[b"index"]) if b"index" in schema.metadata else None
+        if columns is None:
+            columns = all_columns
+        else:
+            self._check_columns(solve_name, metric, columns, all_columns)
+        if not columns or num_periods == 0:
+            index = pd.RangeIndex(num_periods) if index is None else index
+            return pd.DataFrame({name: np.empty(num_periods) for name in columns}, columns=columns, index=index)
+
+        if self._file_format == "parquet":
+            table = pq.read_table(file_path, filters=[("column", "in", columns)], memory_map=True)
+        else:
+            table = pa.ipc.open_file(pa.memory_map(str(file_path), "r")).read_all()  # zero-copy, buffers keep the file mapped
+            table = table.filter(pc.is_in(table["column"].cast(pa.string()), value_set=pa.array(columns, type=pa.string())))
+
+        # rows are sorted by column and period, so each column is one block of num_periods rows
+        names = table["column"].cast(pa.string()).to_numpy(zero_copy_only=False)[::num_periods]
+        values = table["value"].to_numpy().reshape((len(names), num_periods))
+        blocks = dict(zip(names, values, strict=True))
+        return pd.DataFrame({name: blocks[name] for name in columns}, columns=columns, index=index)
+
+    def _get_file_path(self, solve_name: str, metric: str) -> Path:
+        return self._path / metric / f"{self._PARTITION}{solve_name}" / f"part-0.{self._file_format}"
+
+    def _read_schema(self, solve_name: str, metric: str) -> object:
+        pa, pq = _import_pyarrow()
+        file_path = self._get_file_path(solve_name, metric)
+        if self._file_format == "parquet":
+            return pq.read_schema(file_path)
+        return pa.ipc.open_file(pa.memory_map(str(file_path), "r")).schema
+
+
+def _encode(names: list[str]) -> NDArray:
+    return np.array([name.encode() for name in names], dtype=bytes) if names else np.array([b""])[:0]
+
+
+def _decode(names: NDArray) -> list[str]:
+    return [name.decode() for name in names]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        message = "Result store formats 'parquet' and 'arrow' need the pyarrow package. Install it with 'pip install pyarrow'."
+        raise ImportError(message) from e
+    return pa, pq
@@ -0,0 +1,71 @@
+"""
+Summary tables written next to the result tables in a ResultStore, so the dashboard can draw bar charts without reading full time series.
+
+For a result table <metric> of a solve (e.g. price, one column per zone), these tables are written:
+
+- <metric>_summary: one row per statistic in SUMMARY_STATISTICS (mean, sum, min, max and percentiles) for each column.
+- <metric>_yearly: mean of each weather year (rows named by year), if the periods split evenly into years.
+- <metric>_weekly: mean of each week (rows 0, 1, 2, ...), if the periods split evenly into 52-week years of whole weeks.
+
+All tables have the same columns as the result table and are small compared to it.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from framdemo.result_store import ResultStore
+
+SUMMARY_STATISTICS = ["mean", "sum", "min", "max", "p05", "p50", "p95"]
+
+_PERCENTILES = [5, 50, 95]
+_WEEKS_PER_YEAR = 52
+
+
+def get_summary(values: NDArray) -> NDArray:
+    """Return array with one row per row of values and one column per statistic in SUMMARY_STATISTICS."""
+    out = np.empty((values.shape[0], len(SUMMARY_STATISTICS)), dtype=np.float64)
+    if values.shape[1] == 0:
+        out.fill(np.nan)
+        return out
+    out[:, 0] = values.mean(axis=1, dtype=np.float64)
+    out[:, 1] = values.sum(axis=1, dtype=np.float64)
+    out[:, 2] = values.min(axis=1)
+    out[:, 3] = values.max(axis=1)
+    out[:, 4:] = np.percentile(values, _PERCENTILES, axis=1).T
+    return out
+
+
+def get_rollup(values: NDArray, num_groups: int) -> NDArray | None:
+    """Return mean of num_groups consecutive groups of periods in each row of values, or None if periods do not split evenly into groups."""
+    num_periods = values.shape[1]
+    if num_groups <= 0 or num_periods == 0 or num_periods % num_groups != 0:
+        return None
+    return values.reshape((values.shape[0], num_groups, num_periods // num_groups)).mean(axis=2, dtype=np.float64)
+
+
+def write_summary(store: ResultStore, solve_name: str, metric: str, columns: list[str], values: NDArray, weather_years: list[int]) -> None:
+    """Write summary, yearly and weekly tables for result table of solve and metric with columns and values (columns x periods)."""
+    store.write_table(solve_name, f"{metric}_summary", columns, get_summary(values), index=SUMMARY_STATISTICS)
+
+    yearly = get_rollup(values, len(weather_years))
+    if yearly is not None:
+        store.write_table(solve_name, f"{metric}_yearly", columns, yearly, index=[str(year) for year in weather_years])
+
+    # only for daily or finer periods in 52-week years (e.g. 364 days per year), so each week has the same number of periods
+    num_weeks = _WEEKS_PER_YEAR * len(weather_years)
+    weekly = get_rollup(values, num_weeks) if values.shape[1] >= num_weeks else None
+    if weekly is not None:
+        store.write_table(solve_name, f"{metric}_weekly", columns, weekly)
+
+
+def read_summary(store: ResultStore, solve_name: str, metric: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Return summary table of solve and metric (one row per statistic, one column per name) for the given columns.
+
+    If the store has no summary table (e.g. written by an older version of demo_7_get_data), it is computed from the result table.
+    """
+    if store.has_table(solve_name, f"{metric}_summary"):
+        return store.read_table(solve_name, f"{metric}_summary", columns)
+    table = store.read_table(solve_name, metric, columns)
+    return pd.DataFrame(get_summary(table.to_numpy().T).T, columns=table.columns, index=SUMMARY_STATISTICS)
@@ -1,5 +1,6 @@
-from multiprocessing import Process
+import sys
 
+import framdemo.demo_utils as du
 from framdemo.demo_1_download_dataset import demo_1_download_dataset
 from framdemo.demo_2_populate_model import demo_2_populate_model
 from framdemo.demo_3_solve_model import demo_3_solve_model
@@ -8,24 +9,84 @@ from framdemo.demo_5_detailed_solve import demo_5_detailed_solve
 from framdemo.demo_6_nordic_solve import demo_6_nordic_solve
 from framdemo.demo_7_get_data import demo_7_get_data
 from framdemo.demo_8_run_dashboard import demo_8_run_dashboard
+from framdemo.result_extraction import extract_and_save_solve, get_saved_results_path
+from framdemo.stage_scheduler import Stage, run_stages
+from framdemo.tracing import clear_spans, get_span_summary, write_chrome_trace
 
 if __name__ == "__main__":
-    demo_1_download_dataset()
-    demo_2_populate_model()
-    demo_3_solve_model(num_cpu_cores=8)
+    if du.TRACE_FOLDER is not None:
+        clear_spans(du.TRACE_FOLDER)
 
-    # run demo 4, 5 and 6 in parallel
-    procs: list[Process] = [
-        Process(target=demo_4_modified_solve, args=(1,)),  # arg is num_cpu_cores
-        Process(target=demo_5_detailed_solve, args=(6,)),  # arg is num_cpu_cores
-        Process(target=demo_6_nordic_solve, args=(1,)),  # arg is num_cpu_cores
+    folder = du.DEMO_FOLDER
+    solve_names = ["base", "modified", "detailed", "modified_nordic"]
+
+    # each stage starts as soon as the stages writing its inputs are done and it has free cores, so e.g.
+    # demo 4, 5 and 6 run in parallel after demo 3, and the results of each solve are extracted as soon as it is done
+    stages = [
+        Stage("demo_1", demo_1_download_dataset, outputs=[folder / "database"]),
+        Stage(
+            "demo_2",
+            demo_2_populate_model,
+            {"num_cpu_cores": 8},
+            [folder / "database"],
+            [folder / "populated_model.pickle"],
+            num_cpu_cores=8,
+        ),
+        Stage(
+            "demo_3",
+            demo_3_solve_model,
+            {"num_cpu_cores": 8},
+            [folder / "populated_model.pickle"],
+            [folder / "aggregated_model.pickle", folder / "base"],
+            num_cpu_cores=8,
+        ),
+        Stage(
+            "demo_5",
+            demo_5_detailed_solve,
+            {"num_cpu_cores": 6},
+            [folder / "populated_model.pickle", folder / "base" / "solver.pickle"],
+            [folder / "detailed"],
+            num_cpu_cores=6,
+        ),
+        Stage(
+            "demo_4",
+            demo_4_modified_solve,
+            {"num_cpu_cores": 1},
+            [folder / "aggregated_model.pickle", folder / "base" / "solver.pickle"],
+            [folder / "modified"],
+        ),
+        Stage(
+            "demo_6",
+            demo_6_nordic_solve,
+            {"num_cpu_cores": 1},
+            [folder / "base" / "model.pickle", folder / "base" / "solver.pickle"],
+            [folder / "modified_nordic"],
+        ),
+        *[
+            Stage(
+                f"extract_{solve_name}",
+                extract_and_save_solve,
+                {"solve_name": solve_name},
+                [folder / solve_name / "model.pickle", folder / "base" / "solver.pickle"],
+                [get_saved_results_path(solve_name)],
+            )
+            for solve_name in solve_names
+        ],
+        Stage(
+            "demo_7",
+            demo_7_get_data,
+            {"solve_names": solve_names},
+            [get_saved_results_path(solve_name) for solve_name in solve_names],
+            [folder / "dashboard_prices", folder / "dashboard_volumes", folder / "dashboard_hydro", folder / "dashboard_detailed_hydro"],
+        ),
     ]
-    for p in procs:
-        p.start()
-    for p in procs:
-        p.join()
 
-    # these will not execute until demo 4, 5 and 6
-    # are done due to the join calls above
-    demo_7_get_data()
+    # stages with unchanged code, inputs and outputs since the last run are skipped (e.g. solves when only extraction code changed)
+    run_stages(stages, num_cpu_cores=8, fingerprint_folder=du.STAGE_FINGERPRINT_FOLDER, force="--force" in sys.argv[1:])
+
+    # time spent in each demo and section, from spans written by all processes
+    if du.TRACE_FOLDER is not None:
+        write_chrome_trace(du.TRACE_FOLDER, du.DEMO_FOLDER / "trace.json")
+        du.display(f"Time per span (trace of all processes in {du.DEMO_FOLDER / 'trace.json'}):", get_span_summary(du.TRACE_FOLDER).round(3))
+
     demo_8_run_dashboard()
@@ -0,0 +1,288 @@
+"""
+Scheduler that runs the stages of the demo pipeline (e.g. demos and result extraction) as soon as they can run, used by run_all.
+
+Each Stage declares the files and folders it reads (inputs) and writes (outputs), and how many CPU cores it uses.
+A stage depends on the stages that write its inputs: an input depends on a stage if it is one of the outputs of the stage
+or inside an output folder (e.g. base/solver.pickle is written by the stage with output base). Inputs that no stage writes
+must exist before the run.
+
+run_stages starts each stage in its own process as soon as the stages it depends on are done and enough of the cores
+are free, in the order the stages are given. So e.g. the results of the base solve can be extracted while the detailed
+solve is still running. If a stage fails, stages that depend on it are not started, the other stages run to the end,
+and a RuntimeError lists the stages that failed or were skipped.
+
+With a fingerprint folder, stages are memoized like targets in make. The fingerprint of a stage is a hash of its code
+(the source of the module of func and of all modules of its package that it imports, e.g. demo_utils with its settings,
+see code_fingerprint, plus any extra modules in code), the versions of the fram packages, its kwargs and the content
+of its inputs. When a stage is done, its fingerprint and a hash of the content of its outputs are saved. On the next run,
+a stage is not run again if its fingerprint and outputs are unchanged, so e.g. changing extraction code only reruns
+extraction, and the saved models, solvers and solve folders are reused.
+
+Paths are artifacts saved under a name with any suffix, so model.pickle also covers model.store (written by demo_utils.save)
+and dashboard_prices covers dashboard_prices.h5. Inside output folders, model stores next to a pickle file with the same
+name (e.g. base/solver.store, converted from base/solver.pickle) are derived from the pickle file and not hashed, so
+writing them again does not make a stage look changed. Content hashes of files are kept in the fingerprint folder by
+path, size and modification time, so only new or changed files are read.
+"""
+
+import hashlib
+import inspect
+import json
+from collections.abc import Callable
+from importlib.metadata import version
+from multiprocessing import Process
+from multiprocessing.connection import wait
+from pathlib import Path
+
+from framcore.events import send_error_event, send_info_event
+
+from framdemo.code_fingerprint import get_code_hash
+from framdemo.tracing import span
+
+_PACKAGES = ["fram-core", "fram-data", "fram-jules"]
+_FILE_HASHES = "file_hashes.json"
+
+
+class Stage:
+    """Step of the pipeline, run as func(**kwargs) in its own process."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        kwargs: dict[str, object] | None = None,
+        inputs: list[Path] | None = None,
+        outputs: list[Path] | None = None,
+        num_cpu_cores: int = 1,
+        code: list[str] | None = None,
+    ) -> None:
+        """
+        Create stage that reads inputs, writes outputs and uses num_cpu_cores. func must be importable (defined at module level).
+
+        code is names of modules that the results of the stage depend on, in addition to the module of func and the modules
+        it imports (e.g. modules that are only run in a subprocess).
+        """
+        self.name = name
+        self.func = func
+        self.kwargs = dict() if kwargs is None else kwargs
+        self.inputs = [] if inputs is None else [Path(path) for path in inputs]
+        self.outputs = [] if outputs is None else [Path(path) for path in outputs]
+        self.num_cpu_cores = num_cpu_cores
+        self.code = [] if code is None else code
+
+
+def get_dependencies(stages: list[Stage]) -> dict[str, set[str]]:
+    """Return names of the stages each stage depends on. Raise ValueError if names are not unique, an input is missing or stages depend on each other in a cycle."""
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        message = f"Stage names must be unique, got {names}."
+        raise ValueError(message)
+
+    dependencies = {stage.name: set() for stage in stages}
+    for stage in stages:
+        for path in stage.inputs:
+            writers = [other.name for other in stages if other is not stage and any(_is_written_by(path, output) for output in other.outputs)]
+            if not writers and not path.exists():
+                message = f"Input {path} of stage {stage.name} does not exist and is not an output of any stage."
+                raise ValueError(message)
+            dependencies[stage.name].update(writers)
+
+    # check for cycles by removing stages without remaining dependencies until none are left
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            message = f"Stages depend on each other in a cycle: {sorted(remaining)}."
+            raise ValueError(message)
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return dependencies
+
+
+@span()
+def run_stages(stages: list[Stage], num_cpu_cores: int, fingerprint_folder: Path | None = None, force: bool = False) -> None:
+    """
+    Run stages in separate processes, each as soon as its dependencies are done and its cores are free.
+
+    Stages are started in the order they are given when several can start. A stage that needs more than num_cpu_cores
+    runs alone. Raise RuntimeError after all other stages are done if any stage failed.
+
+    With fingerprint_folder, stages whose fingerprint and outputs are unchanged since they were last run are skipped
+    (unless force is True), and fingerprints of stages that are run are saved there.
+    """
+    dependencies = get_dependencies(stages)
+    fingerprints = None if fingerprint_folder is None else _Fingerprints(Path(fingerprint_folder), stages)
+    pending = list(stages)
+    running: dict[int, tuple[Stage, Process]] = dict()
+    done: set[str] = set()
+    failed: set[str] = set()
+    skipped: set[str] = set()
+    checked: set[str] = set()
+    free_cores = num_cpu_cores
+
+    while pending or running:
+        # skip stages that depend on failed or skipped stages
+        for stage in [stage for stage in pending if dependencies[stage.name] & (failed | skipped)]:
+            send_error_event(run_stages, f"Skipping stage {stage.name} because a stage it depends on failed.", "StageSkipped", "")
+            skipped.add(stage.name)
+            pending.remove(stage)
+
+        # skip stages with unchanged fingerprint and outputs (checked once, when their dependencies are done),
+        # repeated since skipping a stage may make stages that depend on it ready
+        is_changed = fingerprints is not None and not force
+        while is_changed:
+            is_changed = False
+            for stage in [stage for stage in pending if stage.name not in checked and dependencies[stage.name] <= done]:
+                checked.add(stage.name)
+                if fingerprints.is_unchanged(stage):
+                    send_info_event(run_stages, f"Skipping stage {stage.name} because its code, inputs and outputs are unchanged.")
+                    done.add(stage.name)
+                    pending.remove(stage)
+                    is_changed = True
+
+        # start stages in order while their dependencies are done and there are free cores
+        for stage in list(pending):
+            num_cores = min(stage.num_cpu_cores, num_cpu_cores)
+            if dependencies[stage.name] <= done and num_cores <= free_cores:
+                if fingerprints is not None:
+                    fingerprints.start(stage)
+                send_info_event(run_stages, f"Starting stage {stage.name} ({num_cores} of {free_cores} free cores)")
+                process = Process(target=stage.func, kwargs=stage.kwargs, name=stage.name)
+                process.start()
+                running[process.sentinel] = (stage, process)
+                free_cores -= num_cores
+                pending.remove(stage)
+
+        if not running:
+            # only if a stage can never start, which get_dependencies rules out
+            skipped.update(stage.name for stage in pending)
+            break
+
+        for sentinel in wait(list(running)):
+            stage, process = running.pop(sentinel)
+            process.join()
+            free_cores += min(stage.num_cpu_cores, num_cpu_cores)
+            if process.exitcode == 0:
+                send_info_event(run_stages, f"Finished stage {stage.name}")
+                if fingerprints is not None:
+                    fingerprints.save(stage)
+                done.add(stage.name)
+            else:
+                send_error_event(run_stages, f"Stage {stage.name} failed with exit code {process.exitcode}.", "StageFailed", "")
+                failed.add(stage.name)
+
+    if failed or skipped:
+        message = f"Stages failed: {sorted(failed)}. Stages skipped: {sorted(skipped)}."
+        raise RuntimeError(message)
+
+
+def _is_written_by(path: Path, output: Path) -> bool:
+    """Return True if path is output or inside output folder."""
+    return path == output or output in path.parents
+
+
+class _Fingerprints:
+    """Fingerprints of stages and content hashes of files, saved in a folder."""
+
+    def __init__(self, folder: Path, stages: list[Stage]) -> None:
+        """Use fingerprints saved in folder for stages."""
+        self._folder = folder
+        self._stages = stages
+        self._versions = {package: version(package) for package in _PACKAGES}
+        self._file_hashes: dict[str, list] = dict()
+        if (folder / _FILE_HASHES).is_file():
+            with (folder / _FILE_HASHES).open() as f:
+                self._file_hashes = json.load(f)
+        self._started: dict[str, str] = dict()
+
+    def is_unchanged(self, stage: Stage) -> bool:
+        """Return True if stage was run with the same fingerprint before, and its outputs are unchanged since then."""
+        path = self._get_record_path(stage)
+        if not path.is_file():
+            return False
+        with path.open() as f:
+            record = json.load(f)
+        return record["fingerprint"] == self.get_fingerprint(stage) and record["outputs"] == self._get_output_hashes(stage)
+
+    def start(self, stage: Stage) -> None:
+        """Remember fingerprint of stage before it is run (its inputs may change while it runs), and delete its saved record."""
+        self._started[stage.name] = self.get_fingerprint(stage)
+        self._get_record_path(stage).unlink(missing_ok=True)
+
+    def save(self, stage: Stage) -> None:
+        """Save fingerprint and output hashes of stage after it was run."""
+        record = {"fingerprint": self._started.pop(stage.name), "outputs": self._get_output_hashes(stage)}
+        self._folder.mkdir(parents=True, exist_ok=True)
+        with self._get_record_path(stage).open("w") as f:
+            json.dump(record, f, indent=2)
+        with (self._folder / _FILE_HASHES).open("w") as f:
+            json.dump(self._file_hashes, f)
+
+    def get_fingerprint(self, stage: Stage) -> str:
+        """Return hash of code, package versions, kwargs and input content of stage."""
+        content = {
+            "code": get_code_hash([inspect.unwrap(stage.func).__module__, *stage.code]),
+            "versions": self._versions,
+            "kwargs": repr(sorted(stage.kwargs.items())),
+            "inputs": {str(path): self._get_artifact_hash(path, []) for path in stage.inputs},
+        }
+        return hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    def _get_output_hashes(self, stage: Stage) -> dict[str, str]:
+        """Return content hash of each output of stage, without outputs of other stages inside it (e.g. extracted results in a solve folder)."""
+        others = [output for other in self._stages if other is not stage for output in other.outputs]
+        return {str(output): self._get_artifact_hash(output, [other for other in others if output in other.parents]) for output in stage.outputs}
+
+    def _get_artifact_hash(self, path: Path, exclude: list[Path]) -> str:
+        """Return hash of content of all files saved under path (with any suffix), except files in artifacts exclude and derived model stores."""
+        excluded = [artifact for other in exclude for artifact in _get_artifact_paths(other)]
+        files = []
+        for artifact in _get_artifact_paths(path):
+            if artifact.is_file():
+                files.append(artifact)
+                continue
+            files.extend(p for p in sorted(artifact.rglob("*")) if p.is_file() and not _is_in_derived_store(p, artifact))
+        sha1 = hashlib.sha1()
+        for file in files:
+            if any(file == other or other in file.parents for other in excluded):
+                continue
+            sha1.update(file.relative_to(path.parent).as_posix().encode())
+            sha1.update(self._get_file_hash(file).encode())
+        return sha1.hexdigest()
+
+    def _get_file_hash(self, path: Path) -> str:
+        """Return hash of content of file, read again only if its size or modification time changed."""
+        stat = path.stat()
+        key = str(path.resolve())
+        cached = self._file_hashes.get(key)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        sha1 = hashlib.sha1()
+        with path.open("rb") as f:
+            while chunk := f.read(1024 * 1024):
+                sha1.update(chunk)
+        self._file_hashes[key] = [stat.st_size, stat.st_mtime_ns, sha1.hexdigest()]
+        return self._file_hashes[key][2]
+
+    def _get_record_path(self, stage: Stage) -> Path:
+        return self._folder / f"{stage.name}.json"
+
+
+def _is_in_derived_store(file: Path, folder: Path) -> bool:
+    """Return True if file is inside a model store in folder that was converted from a pickle file next to it (see demo_utils.convert_to_store)."""
+    for parent in file.relative_to(folder).parents:
+        store = folder / parent
+        if store.suffix == ".store" and store.with_suffix(".pickle").is_file():
+            return True
+    return False
+
+
+def _get_artifact_paths(path: Path) -> list[Path]:
+    """Return existing paths of artifact saved at path, with its own or another suffix (e.g. model.pickle and model.store)."""
+    paths = [path] if path.exists() else []
+    if path.parent.is_dir():
+        paths.extend(sorted(p for p in path.parent.glob(f"{path.stem}.*") if p != path))
+    return paths
@@ -0,0 +1,222 @@
+"""
+Timing of demo stages with spans, exported as a Chrome trace and a summary table.
+
+A span measures a named block of code, used as a context manager or as a decorator:
+
+    with span("write prices", solve=solve_name):
+        ...
+
+    @span()
+    def demo_7_get_data(...): ...
+
+Spans can be nested (also across functions), and record wall time, CPU time of the process, change in resident memory
+(RSS, needs psutil) and process and thread id. Start and stop of each span are sent as span_start and span_stop
+events through framcore.events.send_event, so they are shown (or logged) by the event handler like other events.
+
+If TRACE_FOLDER is set in demo_utils, each process also appends its finished spans to spans.<pid>.jsonl in that folder.
+Spans of all processes (e.g. demo 4, 5 and 6 running in parallel, or workers in demo_7_get_data) are then combined
+by write_chrome_trace, which writes a file that can be opened in https://ui.perfetto.dev or chrome://tracing,
+and get_span_summary, which returns a table of time and memory per span name.
+"""
+
+import functools
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import TracebackType
+
+import pandas as pd
+from framcore.events import send_event
+
+import framdemo.demo_utils as du
+
+_SPAN_FILE_PREFIX = "spans."
+
+_span_ids = itertools.count()
+_local = threading.local()
+_file_lock = threading.Lock()
+_process = None
+
+
+class Span:
+    """Timed block of code. Use span to create one."""
+
+    def __init__(self, name: str | None, attributes: dict[str, object]) -> None:
+        """Create span with name (or the name of the decorated function if None) and attributes added to its events."""
+        self._name = name
+        self._attributes = attributes
+
+    def __call__(self, func: Callable) -> Callable:
+        """Return func wrapped in a new span for each call."""
+        name = func.__name__ if self._name is None else self._name
+
+        @functools.wraps(func)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            with Span(name, self._attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def __enter__(self) -> "Span":
+        """Start span and send span_start event."""
+        if self._name is None:
+            message = "A span used as a context manager needs a name."
+            raise ValueError(message)
+        stack = _get_stack()
+        self._id = f"{os.getpid()}-{next(_span_ids)}"
+        self._parent_id = stack[-1]._id if stack else None
+        self._depth = len(stack)
+        stack.append(self)
+        send_event(None, "span_start", name=self._name, span_id=self._id, parent_id=self._parent_id, depth=self._depth, **self._attributes)
+        self._start_time = time.time()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._start_rss = _get_rss()
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        """Stop span, send span_stop event and write span to the trace folder (if set)."""
+        wall_seconds = time.perf_counter() - self._start_wall
+        cpu_seconds = time.process_time() - self._start_cpu
+        rss = _get_rss()
+        rss_delta_mb = None if rss is None or self._start_rss is None else (rss - self._start_rss) / 1024**2
+        _get_stack().remove(self)
+
+        record = {
+            "name": self._name,
+            "span_id": self._id,
+            "parent_id": self._parent_id,
+            "depth": self._depth,
+            "start_time": self._start_time,
+            "wall_seconds": wall_seconds,
+            "cpu_seconds": cpu_seconds,
+            "rss_delta_mb": rss_delta_mb,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "process_name": multiprocessing.current_process().name,
+            "failed": exc_type is not None,
+            "attributes": self._attributes,
+        }
+        send_event(
+            None,
+            "span_stop",
+            name=self._name,
+            span_id=self._id,
+            depth=self._depth,
+            wall_seconds=wall_seconds,
+            cpu_seconds=cpu_seconds,
+            rss_delta_mb=rss_delta_mb,
+            failed=exc_type is not None,
+            **self._attributes,
+        )
+        if du.TRACE_FOLDER is not None:
+            _write_span(du.TRACE_FOLDER, record)
+
+
+def span(name: str | None = None, **attributes: object) -> Span:
+    """
+    Return span with name and attributes (e.g. solve=solve_name), used as context manager or decorator.
+
+    As a decorator, name may be left out to use the name of the function.
+    """
+    return Span(name, attributes)
+
+
+def read_spans(folder: Path) -> list[dict]:
+    """Return finished spans written to folder by all processes, ordered by start time."""
+    spans = []
+    for path in sorted(Path(folder).glob(f"{_SPAN_FILE_PREFIX}*.jsonl")):
+        with path.open(encoding="utf-8") as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+    return sorted(spans, key=lambda record: record["start_time"])
+
+
+def clear_spans(folder: Path) -> None:
+    """Delete spans written to folder, e.g. before a new run of the demos."""
+    for path in Path(folder).glob(f"{_SPAN_FILE_PREFIX}*.jsonl"):
+        path.unlink(missing_ok=True)
+
+
+def write_chrome_trace(folder: Path, path: Path) -> None:
+    """Write spans in folder to path in Chrome trace event format (JSON), for https://ui.perfetto.dev or chrome://tracing."""
+    spans = read_spans(folder)
+    events = []
+    for pid, process_name in {record["pid"]: record["process_name"] for record in spans}.items():
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"{process_name} ({pid})"}})
+    for record in spans:
+        args = {
+            "cpu_seconds": record["cpu_seconds"],
+            "rss_delta_mb": record["rss_delta_mb"],
+            "failed": record["failed"],
+            **{key: str(value) for key, value in record["attributes"].items()},
+        }
+        events.append(
+            {
+                "name": record["name"],
+                "cat": "demo",
+                "ph": "X",
+                "ts": record["start_time"] * 1e6,
+                "dur": record["wall_seconds"] * 1e6,
+                "pid": record["pid"],
+                "tid": record["tid"],
+                "args": args,
+            },
+        )
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with Path(path).open("w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def get_span_summary(folder: Path) -> pd.DataFrame:
+    """
+    Return one row per span name with count, total, mean and max wall time, total CPU time and max RSS change (MB).
+
+    Rows are sorted by total wall time. Nested spans are counted in their own row and in their parents.
+    """
+    columns = ["count", "wall_seconds", "mean_wall_seconds", "max_wall_seconds", "cpu_seconds", "max_rss_delta_mb"]
+    spans = read_spans(folder)
+    if not spans:
+        return pd.DataFrame(columns=columns)
+    df = pd.DataFrame(spans)
+    summary = df.groupby("name").agg(
+        count=("wall_seconds", "size"),
+        wall_seconds=("wall_seconds", "sum"),
+        mean_wall_seconds=("wall_seconds", "mean"),
+        max_wall_seconds=("wall_seconds", "max"),
+        cpu_seconds=("cpu_seconds", "sum"),
+        max_rss_delta_mb=("rss_delta_mb", "max"),
+    )
+    return summary.sort_values("wall_seconds", ascending=False)[columns]
+
+
+def _get_stack() -> list[Span]:
+    """Return open spans of the current thread, innermost last."""
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _get_rss() -> int | None:
+    """Return resident memory of this process in bytes, or None if psutil is not installed."""
+    global _process
+    if _process is None or _process.pid != os.getpid():
+        try:
+            import psutil
+        except ImportError:
+            return None
+        _process = psutil.Process()
+    return _process.memory_info().rss
+
+
+def _write_span(folder: Path, record: dict) -> None:
+    """Append finished span to the span file of this process in folder."""
+    line = json.dumps(record, default=str) + "\n"
+    with _file_lock:
+        Path(folder).mkdir(parents=True, exist_ok=True)
+        with (Path(folder) / f"{_SPAN_FILE_PREFIX}{os.getpid()}.jsonl").open("a", encoding="utf-8") as f:
+            f.write(line)
@@ -0,0 +1,118 @@
+"""
+Folders whose content is replaced atomically, used for model stores and Parquet/Arrow result stores.
+
+A versioned folder holds version folders and a pointer file with the name of the current version. New content is
+written to a new version folder (create_version) and published by renaming it and then atomically replacing the pointer
+file (publish_version). Versions are published one at a time, under a file lock. Readers that look up the current version (get_current_version) therefore always see a complete
+version, and the folder itself always exists. When a version is published, the version it replaces is kept, so that
+readers that looked it up just before can still open it, and older versions are deleted. read_current_version looks up
+the current version again if a version is deleted while it is read.
+"""
+
+import shutil
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TypeVar
+from uuid import uuid4
+
+from framdemo.file_lock import FileLock
+
+_POINTER_FILE = "CURRENT"
+_LOCK_FILE = "CURRENT.lock"
+_VERSION_PREFIX = "v-"
+_TMP_SUFFIX = ".tmp"
+_STALE_TMP_SECONDS = 24 * 3600  # unpublished versions older than this are left over from writers that crashed
+_MAX_READ_ATTEMPTS = 5
+
+T = TypeVar("T")
+
+
+def create_version(folder: Path) -> Path:
+    """Return new empty version folder in folder, to be written and then published with publish_version (or discarded)."""
+    folder.mkdir(parents=True, exist_ok=True)
+    version = folder / f"{_VERSION_PREFIX}{time.time_ns():020d}-{uuid4().hex[:8]}{_TMP_SUFFIX}"
+    version.mkdir()
+    return version
+
+
+def publish_version(version: Path) -> Path:
+    """
+    Make version the current version of its folder and return its published path.
+
+    Versions older than the version it replaces, and content of the folder that is not a version (e.g. files of a store
+    written before versioning), are deleted. Versions that other writers have not published yet are kept.
+    """
+    folder = version.parent
+    with FileLock(folder / _LOCK_FILE) as lock:
+        lock.acquire(poll_seconds=0.01)
+        previous = get_current_version(folder)
+        # named by time of publishing, so a newer version always has a larger name
+        published = folder / f"{_VERSION_PREFIX}{time.time_ns():020d}-{uuid4().hex[:8]}"
+        version.rename(published)
+        tmp_path = folder / f"{_POINTER_FILE}{_TMP_SUFFIX}"
+        tmp_path.write_text(published.name, encoding="utf-8")
+        tmp_path.replace(folder / _POINTER_FILE)
+
+        oldest_kept = published.name if previous is None else previous.name
+        for path in folder.iterdir():
+            if path.name in (_POINTER_FILE, _LOCK_FILE) or (
+                path.name.startswith(_VERSION_PREFIX) and not path.name.endswith(_TMP_SUFFIX) and path.name >= oldest_kept
+            ):
+                continue
+            if path.name.endswith(_TMP_SUFFIX) and time.time() - path.stat().st_mtime < _STALE_TMP_SECONDS:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+    return published
+
+
+def discard_version(version: Path) -> None:
+    """Delete version folder that was not published, e.g. after writing it failed."""
+    shutil.rmtree(version, ignore_errors=True)
+
+
+def get_current_version(folder: Path) -> Path | None:
+    """Return current version folder of folder, or None if no version is published."""
+    name = None
+    for __ in range(_MAX_READ_ATTEMPTS):
+        try:
+            current_name = (folder / _POINTER_FILE).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if not current_name or current_name == name:
+            return None
+        name = current_name
+        if (folder / name).is_dir():
+            return folder / name
+        # the version was replaced and deleted after the pointer was read
+    return None
+
+
+def read_current_version(folder: Path, read: Callable[[Path], T]) -> T:
+    """Return read(current version folder of folder). If the version is deleted while it is read, read the new current version."""
+    version = _get_published_version(folder)
+    for __ in range(_MAX_READ_ATTEMPTS - 1):
+        try:
+            return read(version)
+        except FileNotFoundError:
+            current = _get_published_version(folder)
+            if current == version:
+                raise
+            version = current
+    return read(version)
+
+
+def get_published_mtime(folder: Path) -> float:
+    """Return time the current version of folder was published."""
+    return (folder / _POINTER_FILE).stat().st_mtime
+
+
+def _get_published_version(folder: Path) -> Path:
+    version = get_current_version(folder)
+    if version is None:
+        message = f"No published version in {folder}."
+        raise FileNotFoundError(message)
+    return version
@@ -0,0 +1,52 @@
+"""
+Catalog of the regional volume series in a result store, so the dashboard can show yearly volumes without reading any series.
+
+The volume table of a solve has one column per key country/direction/category (e.g. Norway/Production/Hydro),
+where direction is Production, Consumption, Import or Export, and category is the production or consumption
+category or the trading partner. The catalog has one row per solve and key with the parts of the key,
+the column where the series is stored and the sum of the series (yearly volume in GWh/year).
+
+demo_7_get_data writes the catalog of each solve as a small table next to its volume table (metric volume_catalog,
+one column per key with the yearly volume in one period), so the catalog is read with one small read per solve.
+It is kept out of the store metadata, which is meant for small key/value data (e.g. a metadata attribute of an HDF5
+file is limited to 64 KB, less than the catalog of a few solves).
+"""
+
+import pandas as pd
+from numpy.typing import NDArray
+
+from framdemo.result_store import ResultStore
+from framdemo.result_summary import read_summary
+
+VOLUME_CATALOG_COLUMNS = ["solve", "country", "direction", "category", "column", "total"]
+
+_METRIC = "volume_catalog"
+
+
+def get_volume_catalog_rows(solve_name: str, keys: list[str], values: NDArray) -> list[list]:
+    """Return catalog rows (see VOLUME_CATALOG_COLUMNS) for volume table of solve with columns keys and values (keys x periods)."""
+    totals = values.sum(axis=1, dtype="float64").tolist()
+    return [[solve_name, *key.split("/", 2), key, total] for key, total in zip(keys, totals, strict=True)]
+
+
+def write_volume_catalog(store: ResultStore, solve_name: str, keys: list[str], values: NDArray) -> None:
+    """Write catalog table of solve to store, for volume table of solve with columns keys and values (keys x periods)."""
+    totals = values.sum(axis=1, dtype="float64").reshape((len(keys), 1))
+    store.write_table(solve_name, _METRIC, keys, totals)
+
+
+def read_volume_catalog(store: ResultStore) -> pd.DataFrame:
+    """
+    Return catalog of volume store as DataFrame with VOLUME_CATALOG_COLUMNS.
+
+    For solves without a catalog table (e.g. written by an older version of demo_7_get_data), it is made from the summary tables.
+    """
+    rows = []
+    for solve_name in store.get_solve_names():
+        if store.has_table(solve_name, _METRIC):
+            table = store.read_table(solve_name, _METRIC)
+            rows.extend(get_volume_catalog_rows(solve_name, list(table.columns), table.to_numpy().T))
+            continue
+        totals = read_summary(store, solve_name, "volume").loc["sum"]
+        rows.extend(get_volume_catalog_rows(solve_name, list(totals.index), totals.to_numpy().reshape((len(totals), 1))))
+    return pd.DataFrame(rows, columns=VOLUME_CATALOG_COLUMNS)
@@ -0,0 +1,122 @@
+"""Tests of the ranged, parallel dataset download in demo_1_download_dataset against a local HTTP server with Range support."""
+
+import hashlib
+import os
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+import framdemo.demo_utils as du
+from framdemo.demo_1_download_dataset import (
+    _CHUNK_SIZE,
+    _create_session,
+    _download_file,
+    _get_manifest_path,
+    _write_manifest,
+)
+
+_SEGMENT_SIZE = _CHUNK_SIZE
+_DATA = os.urandom(3 * _SEGMENT_SIZE + 12345)
+_CHECKSUM = "md5:" + hashlib.md5(_DATA).hexdigest()
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serve _DATA at any path, with single byte ranges, and record the requested ranges on the server."""
+
+    def do_GET(self) -> None:
+        header = self.headers.get("Range")
+        if header is None:
+            start, end = 0, len(_DATA) - 1
+            self.send_response(200)
+        else:
+            first, last = header.removeprefix("bytes=").split("-")
+            start, end = int(first), min(int(last), len(_DATA) - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(_DATA)}")
+        with self.server.lock:
+            self.server.ranges.append((start, end))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(_DATA[start : end + 1])
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server() -> Iterator[ThreadingHTTPServer]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    server.ranges = []
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _small_segments(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(du, "DOWNLOAD_SEGMENT_SIZE", _SEGMENT_SIZE)
+    monkeypatch.setattr(du, "DOWNLOAD_NUM_CONNECTIONS", 3)
+
+
+def _download(server: ThreadingHTTPServer, file_path: Path, checksum: str | None) -> None:
+    with _create_session("fram-demo-test") as session:
+        _download_file(session, f"http://127.0.0.1:{server.server_port}/dataset.zip", file_path, checksum)
+
+
+def _get_segment_ranges(server: ThreadingHTTPServer) -> list[tuple[int, int]]:
+    """Return requested ranges, without the probe of the file size."""
+    return sorted(r for r in server.ranges if r != (0, 0))
+
+
+def test_download_in_segments(server: ThreadingHTTPServer, tmp_path: Path) -> None:
+    file_path = tmp_path / "dataset.zip"
+
+    _download(server, file_path, _CHECKSUM)
+
+    assert file_path.read_bytes() == _DATA
+    assert not _get_manifest_path(file_path).exists()
+    starts = range(0, len(_DATA), _SEGMENT_SIZE)
+    assert _get_segment_ranges(server) == [(start, min(start + _SEGMENT_SIZE, len(_DATA)) - 1) for start in starts]
+
+
+def test_download_resumes_from_manifest(server: ThreadingHTTPServer, tmp_path: Path) -> None:
+    file_path = tmp_path / "dataset.zip"
+    done = {0, 2 * _SEGMENT_SIZE}
+    partial_data = bytearray(len(_DATA))
+    for start in done:
+        partial_data[start : start + _SEGMENT_SIZE] = _DATA[start : start + _SEGMENT_SIZE]
+    file_path.write_bytes(partial_data)
+    _write_manifest(_get_manifest_path(file_path), len(_DATA), _SEGMENT_SIZE, _CHECKSUM, "file", done)
+
+    _download(server, file_path, _CHECKSUM)
+
+    assert file_path.read_bytes() == _DATA
+    assert not _get_manifest_path(file_path).exists()
+    assert [start for start, __ in _get_segment_ranges(server)] == [_SEGMENT_SIZE, 3 * _SEGMENT_SIZE]
+
+
+def test_download_restarts_when_manifest_does_not_match(server: ThreadingHTTPServer, tmp_path: Path) -> None:
+    file_path = tmp_path / "dataset.zip"
+    file_path.write_bytes(bytes(len(_DATA)))
+    _write_manifest(_get_manifest_path(file_path), len(_DATA), _SEGMENT_SIZE, "md5:" + "0" * 32, "file", {0})
+
+    _download(server, file_path, _CHECKSUM)
+
+    assert file_path.read_bytes() == _DATA
+    assert len(_get_segment_ranges(server)) == len(range(0, len(_DATA), _SEGMENT_SIZE))
+
+
+def test_download_with_wrong_checksum_fails(server: ThreadingHTTPServer, tmp_path: Path) -> None:
+    file_path = tmp_path / "dataset.zip"
+
+    with pytest.raises(RuntimeError, match="Checksum mismatch"):
+        _download(server, file_path, "md5:" + "0" * 32)
+
+    assert not file_path.exists()
+    assert not _get_manifest_path(file_path).exists()
@@ -0,0 +1,91 @@
+"""Tests of skipping unchanged stages in stage_scheduler.run_stages, with stages defined in a package written to a temporary folder."""
+
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from framdemo.stage_scheduler import Stage, run_stages
+
+_STAGES_SOURCE = """
+from pathlib import Path
+
+from {package} import helper
+
+
+def copy(input_path: str, output_path: str, log_path: str) -> None:
+    with Path(log_path).open("a") as f:
+        f.write(Path(output_path).name + "\\n")
+    Path(output_path).write_text(Path(input_path).read_text() + helper.SUFFIX)
+"""
+
+
+class _Pipeline:
+    """Stage a copies input.txt to a.txt, and stage b copies a.txt to b.txt. Each run of a stage is logged."""
+
+    def __init__(self, folder: Path, package: str) -> None:
+        self.folder = folder
+        self.package_folder = folder / package
+        self.package_folder.mkdir()
+        (self.package_folder / "__init__.py").write_text("")
+        (self.package_folder / "helper.py").write_text('SUFFIX = "!"\n')
+        (self.package_folder / "stages.py").write_text(textwrap.dedent(_STAGES_SOURCE.format(package=package)))
+        (folder / "input.txt").write_text("data")
+        __import__(f"{package}.stages")
+        self.copy = sys.modules[f"{package}.stages"].copy
+
+    def run(self, force: bool = False) -> list[str]:
+        """Run stages and return names of the outputs of the stages that were run."""
+        log_path = self.folder / "log.txt"
+        log_path.unlink(missing_ok=True)
+        stages = [
+            Stage("a", self.copy, self._get_kwargs("input.txt", "a.txt"), [self.folder / "input.txt"], [self.folder / "a.txt"]),
+            Stage("b", self.copy, self._get_kwargs("a.txt", "b.txt"), [self.folder / "a.txt"], [self.folder / "b.txt"]),
+        ]
+        run_stages(stages, num_cpu_cores=2, fingerprint_folder=self.folder / "fingerprints", force=force)
+        return sorted(log_path.read_text().split()) if log_path.exists() else []
+
+    def _get_kwargs(self, input_name: str, output_name: str) -> dict[str, str]:
+        return {"input_path": str(self.folder / input_name), "output_path": str(self.folder / output_name), "log_path": str(self.folder / "log.txt")}
+
+
+@pytest.fixture
+def pipeline(request: pytest.FixtureRequest, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> _Pipeline:
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # one package per test, since imported modules are kept in sys.modules
+    return _Pipeline(tmp_path, f"stages_{request.node.name}")
+
+
+def test_unchanged_stages_are_skipped(pipeline: _Pipeline) -> None:
+    assert pipeline.run() == ["a.txt", "b.txt"]
+    assert pipeline.run() == []
+    assert (pipeline.folder / "b.txt").read_text() == "data!!"
+
+
+def test_changed_input_reruns_stage_and_stages_that_depend_on_it(pipeline: _Pipeline) -> None:
+    pipeline.run()
+    (pipeline.folder / "input.txt").write_text("new data")
+
+    assert pipeline.run() == ["a.txt", "b.txt"]
+    assert (pipeline.folder / "b.txt").read_text() == "new data!!"
+
+
+def test_changed_output_reruns_stage(pipeline: _Pipeline) -> None:
+    pipeline.run()
+    (pipeline.folder / "b.txt").write_text("edited")
+
+    assert pipeline.run() == ["b.txt"]
+
+
+def test_changed_imported_code_reruns_stages(pipeline: _Pipeline) -> None:
+    pipeline.run()
+    (pipeline.package_folder / "helper.py").write_text('SUFFIX = "?"\n')
+
+    assert pipeline.run() == ["a.txt", "b.txt"]
+
+
+def test_force_reruns_unchanged_stages(pipeline: _Pipeline) -> None:
+    pipeline.run()
+
+    assert pipeline.run(force=True) == ["a.txt", "b.txt"]